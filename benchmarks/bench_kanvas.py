@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+
+#=========================================================================
+#
+#  Copyright (c) 2018  Karl T. Diedrich, PhD
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#=========================================================================*/
+
+
+'''Benchmarks of kanvas hot paths at several point counts, time and memory written to JSON.
+Each case runs in a fresh process so its peak resident memory is its own. Runs headless.
+
+python3 benchmarks/bench_kanvas.py --sizes 1e3 1e4 1e5 1e6 1e7 --output bench.json
+python3 benchmarks/bench_kanvas.py --output new.json --compare old.json
+
+: author Karl T. Diedrich, PhD <ktdiedrich@gmail.com>
+'''
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+
+def _points(n):
+    return np.random.default_rng(0).uniform(-10.0, 10.0, size=(n, 3))
+
+
+def _gridStep(n):
+    '''Step of a [-1, 1) square grid of about n points
+'''
+    return 2.0 / max(1, int(round(np.sqrt(n))))
+
+
+def setupAddPoint(n):
+    from kanvas.plot import PointData
+    points = _points(n)
+    def run():
+        pointData = PointData(maxNumPoints=n)
+        for point in points:
+            pointData.addPoint(point)
+    return run
+
+
+def setupAddPoints(n):
+    from kanvas.plot import PointData
+    points = _points(n)
+    def run():
+        PointData(maxNumPoints=n).addPoints(points, deep=True)
+    return run
+
+
+def setupLoadData(n):
+    from kanvas.plot import load_data
+    csvFile = tempfile.NamedTemporaryFile(suffix='.csv', delete=False)
+    csvFile.close()
+    np.savetxt(csvFile.name, _points(n), delimiter=',', fmt='%.6f')
+    def run():
+        load_data(csvFile.name, maxNumPoints=n)
+    run.cleanup = lambda: os.remove(csvFile.name)
+    return run
+
+
+def setupMakePointData(n, vectorize=True):
+    from kanvas.plot import makePointData
+    from kanvas.shapes import parabola3D
+    from kanvas.transform import rotation
+    step = _gridStep(n)
+    rotationMatrix = rotation(0.3, 0.2, 0.1)
+    def run():
+        makePointData(-1.0, 1.0, -1.0, 1.0, parabola3D, step=step, rotationMatrix=rotationMatrix,
+                      vectorize=vectorize)
+    return run
+
+
+def setupMakePointDataScalar(n):
+    return setupMakePointData(n, vectorize=False)
+
+
+def setupMakeSpherePoints(n):
+    from kanvas.plot import makeSpherePoints
+    step = np.pi * np.sqrt(2.0 / n)
+    def run():
+        makeSpherePoints(4.0, step=step)
+    return run
+
+
+def setupRotate(n):
+    from kanvas.transform import Rotation, rotation
+    rotator = Rotation(rotation(0.3, 0.2, 0.1))
+    points = _points(n)
+    def run():
+        for point in points:
+            rotator.rotate(point)
+    return run
+
+
+def setupRotateBatch(n):
+    from kanvas.transform import Rotation, rotation
+    rotator = Rotation(rotation(0.3, 0.2, 0.1))
+    points = _points(n)
+    def run():
+        rotator.rotate(points, inPlace=True)
+    return run
+
+
+def setupOffscreenRender(n, numFrames=10, renderMode='vertices'):
+    from kanvas.canvas import Renderer, RenderWindow
+    from kanvas.plot import VtkPointCloud
+    cloud = VtkPointCloud(maxNumPoints=n, renderMode=renderMode)
+    cloud.addPoints(_points(n))
+    window = RenderWindow(size=(400, 400), offscreen=True)
+    renderer = Renderer()
+    renderer.addActor(cloud.vtkActor)
+    window.addRenderer(renderer)
+    renderer.renderer.ResetCamera()
+    window.render()
+    def run():
+        for _ in range(numFrames):
+            for ren in window.renderers:
+                ren.GetActiveCamera().Azimuth(1)
+            window.render()
+    run.frames = numFrames
+    return run
+
+
+def setupOffscreenRenderSplats(n):
+    return setupOffscreenRender(n, renderMode='splats')
+
+
+# name: (setup function, per-point Python loop)
+CASES = {
+    'PointData.addPoint': (setupAddPoint, True),
+    'PointData.addPoints': (setupAddPoints, False),
+    'load_data': (setupLoadData, False),
+    'makePointData': (setupMakePointData, False),
+    'makePointData.scalar': (setupMakePointDataScalar, True),
+    'makeSpherePoints': (setupMakeSpherePoints, False),
+    'Rotation.rotate': (setupRotate, True),
+    'Rotation.rotate.batch': (setupRotateBatch, False),
+    'RenderWindow.offscreen': (setupOffscreenRender, False),
+    'RenderWindow.offscreen.splats': (setupOffscreenRenderSplats, False),
+}
+
+
+def _peakRssBytes():
+    # ru_maxrss is kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def runCase(name, n, repeat):
+    '''Time a case in this process
+    : return result dictionary
+'''
+    setup, _ = CASES[name]
+    # import VTK before the baseline so its libraries are not counted against the case
+    import kanvas.plot
+    baselineRss = _peakRssBytes()
+    run = setup(n)
+    seconds = []
+    tracemalloc.start()
+    for _ in range(repeat):
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        run()
+        seconds.append(time.perf_counter() - start)
+    _, tracedPeak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if hasattr(run, 'cleanup'):
+        run.cleanup()
+    best = min(seconds)
+    result = {'name': name, 'size': n, 'seconds': best, 'allSeconds': seconds,
+              'pointsPerSecond': n / best if best else None,
+              'tracemallocPeakBytes': tracedPeak,
+              'peakRssBytes': _peakRssBytes(), 'peakRssGrowthBytes': _peakRssBytes() - baselineRss}
+    if hasattr(run, 'frames'):
+        result['framesPerSecond'] = run.frames / best if best else None
+    return result
+
+
+def _caseProcess(name, n, repeat, results):
+    try:
+        results.put(runCase(name, n, repeat))
+    except Exception as error:
+        results.put({'name': name, 'size': n, 'error': repr(error)})
+
+
+def runIsolated(name, n, repeat, timeout=None):
+    '''Time a case in a fresh process so memory peaks do not carry over between cases
+    : timeout seconds before the case is stopped, no limit when None
+    : return result dictionary, with an error when the process died, e.g. killed out of memory, or timed out
+'''
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=_caseProcess, args=(name, n, repeat, results))
+    start = time.perf_counter()
+    process.start()
+    result = None
+    while result is None:
+        try:
+            result = results.get(timeout=1.0)
+        except queue.Empty:
+            if not process.is_alive():
+                # a result put just before exiting is flushed by then
+                try:
+                    result = results.get(timeout=1.0)
+                except queue.Empty:
+                    result = {'name': name, 'size': n,
+                              'error': 'process exited with code {}'.format(process.exitcode)}
+            elif timeout and time.perf_counter() - start > timeout:
+                process.terminate()
+                result = {'name': name, 'size': n, 'error': 'timed out after {} s'.format(timeout)}
+    process.join()
+    return result
+
+
+def metadata():
+    import vtk
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                                         cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'date': datetime.datetime.now().isoformat(),
+            'python': platform.python_version(), 'numpy': np.__version__,
+            'vtk': vtk.vtkVersion.GetVTKVersion(), 'platform': platform.platform(),
+            'cpus': os.cpu_count()}
+
+
+def compare(results, baseline):
+    '''Print time ratios of results against a baseline JSON file of this benchmark
+'''
+    old = {(r['name'], r['size']): r for r in baseline['results'] if 'seconds' in r}
+    for result in results:
+        key = (result['name'], result['size'])
+        if 'seconds' in result and key in old:
+            print("{:<24} {:>10} {:>8.2f}x time {:>8.2f}x peak RSS".format(
+                result['name'], result['size'], result['seconds'] / old[key]['seconds'],
+                result['peakRssGrowthBytes'] / max(1, old[key]['peakRssGrowthBytes'])))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark kanvas hot paths')
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1e3, 1e4, 1e5, 1e6, 1e7],
+                        help='point counts')
+    parser.add_argument('--cases', type=str, nargs='+', default=list(CASES), choices=list(CASES),
+                        help='cases to run')
+    parser.add_argument('--max-loop-size', type=float, default=1e5,
+                        help='largest size of cases looping over points in Python')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case, the fastest is reported')
+    parser.add_argument('--output', type=str, default='bench.json', help='JSON results file')
+    parser.add_argument('--compare', type=str, default=None, help='earlier JSON results to compare with')
+    parser.add_argument('--in-process', action='store_true', help='run cases in this process')
+    parser.add_argument('--timeout', type=float, default=None, help='seconds before an isolated case is stopped')
+    args = parser.parse_args()
+
+    results = []
+    for name in args.cases:
+        for n in sorted(int(size) for size in args.sizes):
+            if CASES[name][1] and n > args.max_loop_size:
+                continue
+            result = runCase(name, n, args.repeat) if args.in_process else runIsolated(name, n, args.repeat, args.timeout)
+            results.append(result)
+            if 'error' in result:
+                print("{:<24} {:>10} error {}".format(name, n, result['error']))
+            else:
+                print("{:<24} {:>10} {:>10.4f} s {:>12.0f} points/s {:>8.1f} MB peak RSS growth".format(
+                    name, n, result['seconds'], result['pointsPerSecond'], result['peakRssGrowthBytes'] / 1e6))
+
+    with open(args.output, 'w') as jsonFile:
+        json.dump({'meta': metadata(), 'results': results}, jsonFile, indent=2)
+    print("Results written to {}".format(args.output))
+    if args.compare:
+        with open(args.compare) as jsonFile:
+            compare(results, json.load(jsonFile))
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+#=========================================================================
+#
+#  Copyright (c) 2018  Karl T. Diedrich, PhD
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#=========================================================================*/
+
+
+'''Render camera paths across a process pool, each worker rendering its frames offscreen.
+: author Karl T. Diedrich, PhD <ktdiedrich@gmail.com>
+'''
+
+import multiprocessing
+import os
+import time
+import numpy as np
+from kanvas.canvas import Renderer, RenderWindow
+from kanvas.plot import VtkPointCloud, loadPointData
+
+
+class CameraPose:
+    '''Picklable camera position, focal point and view up
+'''
+    def __init__(self, position, focalPoint=(0.0, 0.0, 0.0), viewUp=(0.0, 0.0, 1.0)):
+        self._position = tuple(position)
+        self._focalPoint = tuple(focalPoint)
+        self._viewUp = tuple(viewUp)
+
+    def apply(self, camera):
+        camera.SetPosition(self._position)
+        camera.SetFocalPoint(self._focalPoint)
+        camera.SetViewUp(self._viewUp)
+
+    @property
+    def position(self):
+        return self._position
+
+    @property
+    def focalPoint(self):
+        return self._focalPoint
+
+    @property
+    def viewUp(self):
+        return self._viewUp
+
+
+class SceneDescription:
+    '''Picklable recipe each worker builds its scene from: a module-level function returning a
+    kanvas Renderer and the arguments to call it with
+'''
+    def __init__(self, builder, size=(300, 300), **kwargs):
+        '''
+    : builder module-level function(**kwargs) returning a Renderer
+    : size image size in pixels
+'''
+        self._builder = builder
+        self._size = size
+        self._kwargs = kwargs
+
+    def build(self):
+        '''
+    : return offscreen RenderWindow with the scene and its camera reset to the scene
+'''
+        window = RenderWindow(size=self._size, offscreen=True)
+        renderer = self._builder(**self._kwargs)
+        window.addRenderer(renderer)
+        renderer.renderer.ResetCamera()
+        return window
+
+    @property
+    def size(self):
+        return self._size
+
+
+def pointDataScene(filename, zMin=-10.0, zMax=10.0, background=(0.1, 0.2, 0.3)):
+    '''Scene builder of a binary point data file, memory-mapped by every worker rather than pickled
+'''
+    renderer = Renderer(background=background)
+    renderer.addActor(VtkPointCloud(zMin=zMin, zMax=zMax, pointData=loadPointData(filename)).vtkActor)
+    return renderer
+
+
+def _renderChunk(scene, firstFrame, poses, pattern):
+    '''Render consecutive frames of the camera path in one worker
+    : poses CameraPose objects or azimuth degrees from the reset camera
+    : return list of file names or images
+'''
+    window = scene.build()
+    cameras = [ren.GetActiveCamera() for ren in window.renderers]
+    resetPoses = [CameraPose(camera.GetPosition(), camera.GetFocalPoint(), camera.GetViewUp())
+                  for camera in cameras]
+    frames = []
+    for frame, pose in enumerate(poses, firstFrame):
+        for camera, resetPose in zip(cameras, resetPoses):
+            if isinstance(pose, CameraPose):
+                pose.apply(camera)
+            else:
+                resetPose.apply(camera)
+                camera.Azimuth(pose)
+            camera.OrthogonalizeViewUp()
+        for ren in window.renderers:
+            ren.ResetCameraClippingRange()
+        if pattern:
+            filename = pattern.format(frame)
+            window.saveImage(filename)
+            frames.append(filename)
+        else:
+            frames.append(window.captureImage().copy())
+    return frames
+
+
+def renderBatch(scene, poses, workers=None, pattern=None, chunkSize=None):
+    '''Split a camera path among a pool of processes and gather the frames in order
+    : scene SceneDescription
+    : poses CameraPose objects or azimuth degrees from the reset camera, one per frame
+    : workers processes, all CPUs when None, rendered in this process when 1
+    : pattern PNG file name pattern like "frame{:04d}.png", images are returned in memory when None
+    : chunkSize consecutive frames per task, poses split evenly among workers when None
+    : return list of file names or (height, width, 3) images in frame order
+'''
+    poses = list(poses)
+    if not poses:
+        return []
+    workers = workers if workers else os.cpu_count()
+    workers = max(1, min(workers, len(poses)))
+    chunkSize = chunkSize if chunkSize else int(np.ceil(len(poses) / float(workers)))
+    tasks = [(scene, begin, poses[begin:begin + chunkSize], pattern) for begin in range(0, len(poses), chunkSize)]
+    if workers == 1:
+        results = [_renderChunk(*task) for task in tasks]
+    else:
+        # spawn so no worker inherits a graphics context from the parent
+        with multiprocessing.get_context('spawn').Pool(workers) as pool:
+            results = pool.starmap(_renderChunk, tasks)
+    return [frame for frames in results for frame in frames]
+
+
+def renderTurntable(scene, numFrames=360, workers=None, pattern=None):
+    '''Render a 360 degree azimuth turntable of the scene across a process pool
+'''
+    return renderBatch(scene, np.arange(numFrames) * 360.0 / numFrames, workers=workers, pattern=pattern)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Render a turntable of a binary point data file')
+    parser.add_argument('--input', type=str, required=True, help='point data file written by PointData.save')
+    parser.add_argument('--output', type=str, default='frame{:04d}.png', help='PNG file name pattern')
+    parser.add_argument('--frames', type=int, default=360, help='frames in the turntable')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, all CPUs by default')
+    parser.add_argument('--size', type=int, nargs=2, default=(600, 600), help='image width and height')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    frames = renderTurntable(SceneDescription(pointDataScene, size=tuple(args.size), filename=args.input),
+                             numFrames=args.frames, workers=args.workers, pattern=args.output)
+    seconds = time.perf_counter() - start
+    print("Rendered {} frames in {:.2f} s, {:.1f} frames/s".format(len(frames), seconds, len(frames) / seconds))
@@ -24,7 +24,12 @@
 '''
 
 import vtk 
+import csv
+import logging
 import time 
+from collections import deque
+import numpy as np
+from vtk.util import numpy_support
 
 class Box:
     '''Box widget around interactor 
@@ -59,30 +64,56 @@ class Box:
 class RenderWindow:
     '''
 '''
+    MAX_FPS = 120.0
     def __init__(self, size=(300, 300), sleepTime=0.03, azimuthStep=1, renderer=None,
-                 interactorStyle=vtk.vtkInteractorStyleTrackballCamera(), BoxClass=None ):
+                 interactorStyle=vtk.vtkInteractorStyleTrackballCamera(), BoxClass=None, offscreen=False ):
+        '''
+    : offscreen render to memory without a window or interactor, for machines without a display. 
+    VTK picks its offscreen context, EGL or OSMesa software rendering with 
+    VTK_DEFAULT_OPENGL_WINDOW=vtkOSOpenGLRenderWindow 
+'''
         self._size = size
         self._sleepTime = sleepTime
         self._azimuthStep = azimuthStep
-        self._rotation = 0
+        self._rotationAnimation = None
+        self._animator = None
+        self._stats = None
+        self._scheduler = None
         self._box = None
+        self._offscreen = offscreen
+        self._windowToImage = None
+        self._pngWriter = None
+        self._framesRendered = 0
+        self._frameSeconds = 0.0
         
         self._renderWindow = vtk.vtkRenderWindow()
         self._renderWindow.SetSize(self._size)
-        self._renderWindowInteractor = vtk.vtkRenderWindowInteractor()
-        self._renderWindowInteractor.SetRenderWindow(self._renderWindow)
-        if interactorStyle:
-            self.interactorStyle = interactorStyle
-        if BoxClass:
-            self._box = Box(interactor=self._renderWindowInteractor)
+        self._renderWindowInteractor = None
+        self._interactorStyle = None
+        if offscreen:
+            self._renderWindow.SetOffScreenRendering(1)
+        else:
+            self._renderWindowInteractor = vtk.vtkRenderWindowInteractor()
+            self._renderWindowInteractor.SetRenderWindow(self._renderWindow)
+            if interactorStyle:
+                self.interactorStyle = interactorStyle
+            if BoxClass:
+                self._box = Box(interactor=self._renderWindowInteractor)
         
         self._renderers = []
+        self._timerCallbacks = {}
+        self._vtkTimers = {}
+        self._timerObserver = None
         if renderer:
             self.addRenderer(renderer)
 
     @property
     def box(self):
         return self._box
+
+    @property
+    def interactor(self):
+        return self._renderWindowInteractor
     
     @property
     def interactorStyle(self):
@@ -91,7 +122,8 @@ class RenderWindow:
     @interactorStyle.setter
     def interactorStyle(self, value):
         self._interactorStyle = value
-        self._renderWindowInteractor.SetInteractorStyle(value)
+        if self._renderWindowInteractor:
+            self._renderWindowInteractor.SetInteractorStyle(value)
         
     @property
     def size(self):
@@ -106,22 +138,162 @@ class RenderWindow:
         renderer.renderer.SetViewport(viewport[0], viewport[1], viewport[2], viewport[3])
         self._renderers.append(renderer.renderer)
         self._renderWindow.AddRenderer(renderer.renderer)
+        if self._stats:
+            self._stats.watch(renderer.renderer)
+
+    def enableStats(self, sinks=(), window=120, reportEvery=30):
+        '''Time every frame of the window and of each renderer viewport 
+    : sinks objects with write(stats), e.g. LogStatsSink or CsvStatsSink 
+    : window frames in the rolling statistics 
+    : reportEvery frames between reports to the sinks 
+    : return RenderStats 
+'''
+        self._stats = RenderStats(self._renderWindow, sinks=sinks, window=window, reportEvery=reportEvery)
+        for ren in self._renderers:
+            self._stats.watch(ren)
+        return self._stats
+
+    def enableScheduler(self, fps=30.0):
+        '''Coalesce renders of changed data into at most one render per frame of only the changed viewports. 
+    Runs on an interactor timer while the window is interactive, call scheduler.tick() otherwise. 
+    : return RenderScheduler 
+'''
+        if self._scheduler is None:
+            self._scheduler = RenderScheduler(self, fps=fps)
+            if self._renderWindowInteractor:
+                self.addTimer(self._scheduler.tick, interval=max(1, int(round(1000.0 / fps))))
+        return self._scheduler
+
+    def requestRender(self):
+        '''Render every viewport at the next scheduler frame, or now without a scheduler 
+'''
+        if self._scheduler:
+            self._scheduler.request()
+        else:
+            self.render()
     
     def renderInteractive(self):
         '''Render displaying source objects. 
     '''
+        if self._offscreen:
+            raise RuntimeError("Offscreen RenderWindow has no interactor, use captureImage or renderFrames")
         self._renderWindow.Render()
         self._renderWindowInteractor.Initialize() 
+        started = set(self._vtkTimers.values())
+        for handle in self._timerCallbacks:
+            if handle not in started:
+                self._startTimer(handle)
         self._renderWindowInteractor.Start()
 
-    def rotate(self):
-        '''Rotate scene in a circle 
+    def addTimer(self, callback, interval=33):
+        '''Call callback() every interval milliseconds while the interactor runs. 
+    The window renders after the call when callback returns True, with a scheduler the scheduler 
+    renders the changed viewports at its next frame instead. 
+    : return handle for removeTimer 
+'''
+        handle = max(self._timerCallbacks, default=0) + 1
+        self._timerCallbacks[handle] = (callback, interval)
+        if self._renderWindowInteractor and self._renderWindowInteractor.GetInitialized():
+            self._startTimer(handle)
+        return handle
+
+    def removeTimer(self, handle):
+        for vtkTimerId, timerHandle in list(self._vtkTimers.items()):
+            if timerHandle == handle:
+                self._renderWindowInteractor.DestroyTimer(vtkTimerId)
+                del self._vtkTimers[vtkTimerId]
+        self._timerCallbacks.pop(handle, None)
+
+    def _startTimer(self, handle):
+        if self._timerObserver is None:
+            self._timerObserver = self._renderWindowInteractor.AddObserver("TimerEvent", self.timerCallback)
+        vtkTimerId = self._renderWindowInteractor.CreateRepeatingTimer(self._timerCallbacks[handle][1])
+        self._vtkTimers[vtkTimerId] = handle
+
+    def timerCallback(self, interactor, eventString):
+        '''Run the callback of the timer that fired 
+'''
+        handle = self._vtkTimers.get(interactor.GetTimerEventId())
+        if handle in self._timerCallbacks and self._timerCallbacks[handle][0]() and self._scheduler is None:
+            self.render()
+
+    def render(self):
+        '''Render one frame and count it in framesPerSecond 
 '''
-        for self._rotation in range(0, 360):
-            time.sleep(self._sleepTime)
-            self._renderWindow.Render()
-            for ren in self._renderers:
-                ren.GetActiveCamera().Azimuth(self._azimuthStep)
+        start = time.perf_counter()
+        self._renderWindow.Render()
+        self._frameSeconds += time.perf_counter() - start
+        self._framesRendered += 1
+
+    def captureImage(self):
+        '''Render and read the window back into memory 
+    : return (height, width, 3) uint8 RGB array, top row first 
+'''
+        self.render()
+        if self._windowToImage is None:
+            self._windowToImage = vtk.vtkWindowToImageFilter()
+            self._windowToImage.SetInput(self._renderWindow)
+            self._windowToImage.SetInputBufferTypeToRGB()
+            self._windowToImage.ReadFrontBufferOff()
+            # the window was just rendered by render(), do not render it again to read it
+            self._windowToImage.ShouldRerenderOff()
+        self._windowToImage.Modified()
+        self._windowToImage.Update()
+        image = self._windowToImage.GetOutput()
+        width, height, _ = image.GetDimensions()
+        pixels = numpy_support.vtk_to_numpy(image.GetPointData().GetScalars())
+        return pixels.reshape(height, width, -1)[::-1]
+
+    def saveImage(self, filename):
+        '''Render and write the window to a PNG file 
+'''
+        self.captureImage()
+        if self._pngWriter is None:
+            self._pngWriter = vtk.vtkPNGWriter()
+            self._pngWriter.SetInputConnection(self._windowToImage.GetOutputPort())
+        self._pngWriter.SetFileName(filename)
+        self._pngWriter.Write()
+
+    def renderFrames(self, numFrames, update=None, pattern=None):
+        '''Render a sequence of frames reusing this window 
+    : update function(frame) moving the scene before each frame 
+    : pattern PNG file name pattern like "frame{:04d}.png", images are returned in memory when None 
+    : return list of file names or of (height, width, 3) arrays 
+'''
+        frames = []
+        for frame in range(numFrames):
+            if update:
+                update(frame)
+            if pattern:
+                filename = pattern.format(frame)
+                self.saveImage(filename)
+                frames.append(filename)
+            else:
+                frames.append(self.captureImage().copy())
+        return frames
+
+    def renderTurntable(self, numFrames=360, pattern=None):
+        '''Render frames turning the cameras 360/numFrames degrees of azimuth between frames 
+'''
+        step = 360.0 / numFrames
+        def turn(frame):
+            if frame:
+                for ren in self._renderers:
+                    ren.GetActiveCamera().Azimuth(step)
+        return self.renderFrames(numFrames, update=turn, pattern=pattern)
+
+    def rotate(self, degrees=360, blocking=False):
+        '''Rotate scene in a circle, azimuthStep degrees per frame at fps frames per second. 
+    Runs on interactor timers while the window stays interactive unless blocking. 
+    Offscreen windows have no interactor timers and always rotate blocking. 
+    : return the AzimuthAnimation, cancel() stops it 
+'''
+        self._rotationAnimation = AzimuthAnimation(self._renderers, degrees=degrees,
+                                                   degreesPerSecond=self._azimuthStep * self.fps)
+        self.animator.add(self._rotationAnimation)
+        if blocking or self._renderWindowInteractor is None:
+            self.animator.run()
+        return self._rotationAnimation
 
     def azimuthCallback(self, obj, string):
         '''Print the current azimuth 
@@ -131,7 +303,57 @@ class RenderWindow:
 
     @property
     def rotation(self):
-        return self._rotation
+        '''Azimuth steps turned by the last rotate 
+'''
+        if self._rotationAnimation is None:
+            return 0
+        return int(self._rotationAnimation.angle / self._azimuthStep)
+
+    @property
+    def animator(self):
+        '''Animator of the window at fps frames per second 
+'''
+        if self._animator is None:
+            self._animator = Animator(self, fps=self.fps)
+        return self._animator
+
+    @property
+    def fps(self):
+        '''Animation frames per second, 1/sleepTime up to MAX_FPS, sleepTime <= 0 animates at MAX_FPS 
+'''
+        if self._sleepTime <= 0:
+            return self.MAX_FPS
+        return min(self.MAX_FPS, 1.0 / self._sleepTime)
+
+    @property
+    def renderWindow(self):
+        return self._renderWindow
+
+    @property
+    def offscreen(self):
+        return self._offscreen
+
+    @property
+    def stats(self):
+        return self._stats
+
+    @property
+    def scheduler(self):
+        return self._scheduler
+
+    @property
+    def framesRendered(self):
+        return self._framesRendered
+
+    @property
+    def framesPerSecond(self):
+        '''Frames per second of render, captureImage and renderFrames 
+'''
+        return self._framesRendered / self._frameSeconds if self._frameSeconds else 0.0
+
+    @property
+    def renderers(self):
+        return self._renderers
     
     @property
     def sleepTime(self):
@@ -140,6 +362,8 @@ class RenderWindow:
     @sleepTime.setter
     def sleepTime(self, value):
         self._sleepTime = value 
+        if self._animator:
+            self._animator.fps = self.fps
 
     @property
     def azimuth(self):
@@ -150,6 +374,410 @@ class RenderWindow:
         self._azimuth = value 
 
 
+def _rendererMTime(renderer):
+    '''Latest modification of what a vtkRenderer draws: its camera and its visible actors, their mappers 
+    and the mapper inputs 
+'''
+    mtime = renderer.GetActiveCamera().GetMTime()
+    actors = renderer.GetActors()
+    actors.InitTraversal()
+    for _ in range(actors.GetNumberOfItems()):
+        actor = actors.GetNextActor()
+        mtime = max(mtime, actor.GetMTime())
+        mapper = actor.GetMapper()
+        if mapper is None:
+            continue
+        mtime = max(mtime, mapper.GetMTime())
+        algorithm = mapper.GetInputAlgorithm()
+        if algorithm is not None:
+            mtime = max(mtime, algorithm.GetMTime())
+        data = mapper.GetInputDataObject(0, 0)
+        if data is not None:
+            mtime = max(mtime, data.GetMTime())
+    return mtime
+
+class RenderScheduler:
+    '''Render at most once per frame interval and only the viewports whose camera, actors or data changed 
+    since they were last drawn. Clean renderers are switched off with vtkRenderer.SetDraw for the render 
+    and keep their last image. 
+'''
+    def __init__(self, renderWindow, fps=30.0, clock=time.perf_counter):
+        '''
+    : renderWindow kanvas RenderWindow 
+    : fps most renders per second 
+'''
+        self._renderWindow = renderWindow
+        self._interval = 1.0 / fps
+        self._clock = clock
+        self._lastRender = None
+        self._stamps = {}
+        self._requested = False
+        self._numRenders = 0
+        self._numViewports = 0
+
+    def request(self):
+        '''Render every viewport at the next tick 
+'''
+        self._requested = True
+
+    def dirtyRenderers(self):
+        '''
+    : return vtkRenderers changed since they were last rendered 
+'''
+        return [ren for ren in self._renderWindow.renderers
+                if self._requested or _rendererMTime(ren) > self._stamps.get(ren, -1)]
+
+    def tick(self):
+        '''Render the changed viewports once a frame interval has passed since the last render 
+    : return False, the window is rendered here when needed 
+'''
+        now = self._clock()
+        if self._lastRender is not None and now - self._lastRender < self._interval:
+            return False
+        dirty = self.dirtyRenderers()
+        if not dirty:
+            return False
+        renderers = self._renderWindow.renderers
+        for ren in renderers:
+            ren.SetDraw(ren in dirty)
+        try:
+            self._renderWindow.render()
+        finally:
+            for ren in renderers:
+                ren.SetDraw(True)
+        # rendering moves camera clipping ranges, stamp after it 
+        for ren in dirty:
+            self._stamps[ren] = _rendererMTime(ren)
+        self._requested = False
+        self._lastRender = now
+        self._numRenders += 1
+        self._numViewports += len(dirty)
+        return False
+
+    @property
+    def interval(self):
+        return self._interval
+
+    @property
+    def numRenders(self):
+        return self._numRenders
+
+    @property
+    def numViewports(self):
+        '''Viewports drawn by the scheduler renders 
+'''
+        return self._numViewports
+
+class Animation:
+    '''Animation run by an Animator, update moves the scene to the elapsed time so late frames are dropped 
+    rather than slowing the animation down 
+'''
+    def __init__(self, duration=None):
+        '''
+    : duration seconds, runs until cancelled when None 
+'''
+        self._duration = duration
+        self._cancelled = False
+
+    def update(self, elapsed):
+        '''Move the scene to elapsed seconds since the animation started 
+    : return False once finished 
+'''
+        return self._duration is None or elapsed < self._duration
+
+    def cancel(self):
+        self._cancelled = True
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    @property
+    def duration(self):
+        return self._duration
+
+class AzimuthAnimation(Animation):
+    '''Turn the cameras of vtkRenderers around their focal points 
+'''
+    def __init__(self, renderers, degrees=360, degreesPerSecond=30.0):
+        Animation.__init__(self, duration=degrees / degreesPerSecond)
+        self._renderers = list(renderers)
+        self._degrees = degrees
+        self._degreesPerSecond = degreesPerSecond
+        self._angle = 0.0
+
+    def update(self, elapsed):
+        angle = min(self._degrees, elapsed * self._degreesPerSecond)
+        for ren in self._renderers:
+            ren.GetActiveCamera().Azimuth(angle - self._angle)
+        self._angle = angle
+        return angle < self._degrees
+
+    @property
+    def angle(self):
+        return self._angle
+
+class TrackAnimation(Animation):
+    '''Orient a vtkActor from the precomputed frames of a kanvas.transform.OrientationTrack 
+'''
+    def __init__(self, actor, track, fps=30.0, loop=False):
+        Animation.__init__(self, duration=None if loop else track.numFrames / fps)
+        self._actor = actor
+        self._track = track
+        self._fps = fps
+        self._vtkMatrix = vtk.vtkMatrix4x4()
+
+    def update(self, elapsed):
+        frame = int(elapsed * self._fps)
+        if self._duration is not None:
+            frame = min(frame, self._track.numFrames - 1)
+        matrix = np.identity(4)
+        matrix[:3, :3] = self._track.matrix(frame)
+        self._vtkMatrix.DeepCopy(matrix.ravel())
+        self._actor.SetUserMatrix(self._vtkMatrix)
+        return Animation.update(self, elapsed)
+
+class Animator:
+    '''Run animations at a fixed target frame rate on the interactor timers of a RenderWindow, rendering once 
+    per frame for all running animations. Frames are dropped when rendering falls behind. 
+'''
+    def __init__(self, renderWindow, fps=30.0, clock=time.perf_counter):
+        self._renderWindow = renderWindow
+        self._fps = fps
+        self._clock = clock
+        self._animations = []
+        self._timer = None
+        self._framesRendered = 0
+        self._framesDropped = 0
+        self._lastFrame = None
+
+    def add(self, animation, delay=0.0):
+        '''Start an animation after delay seconds alongside the running ones 
+    : return animation 
+'''
+        self._animations.append((animation, self._clock() + delay))
+        if self._timer is None:
+            self._timer = self._renderWindow.addTimer(self.tick, interval=max(1, int(1000.0 / self._fps)))
+        return animation
+
+    def cancel(self):
+        '''Cancel every animation 
+'''
+        for animation, _ in self._animations:
+            animation.cancel()
+
+    def tick(self):
+        '''Update every started animation to the current time 
+    : return True when the window needs a render 
+'''
+        now = self._clock()
+        frame = int(now * self._fps)
+        if self._lastFrame is not None:
+            if frame == self._lastFrame:
+                return False
+            self._framesDropped += max(0, frame - self._lastFrame - 1)
+        self._lastFrame = frame
+        running = []
+        changed = False
+        for animation, start in self._animations:
+            if animation.cancelled:
+                continue
+            if now < start:
+                running.append((animation, start))
+            else:
+                changed = True
+                if animation.update(now - start):
+                    running.append((animation, start))
+        self._animations = running
+        if not running:
+            self._stop()
+        if changed:
+            self._framesRendered += 1
+        return changed
+
+    def run(self):
+        '''Block until every animation finishes, rendering on frame deadlines, for scripts without an event loop 
+'''
+        while self._animations:
+            if self.tick():
+                self._renderWindow.render()
+            if self._lastFrame is not None:
+                time.sleep(max(0.0, (self._lastFrame + 1) / self._fps - self._clock()))
+
+    def _stop(self):
+        if self._timer is not None:
+            self._renderWindow.removeTimer(self._timer)
+            self._timer = None
+        self._lastFrame = None
+
+    @property
+    def running(self):
+        return len(self._animations) > 0
+
+    @property
+    def fps(self):
+        return self._fps
+
+    @fps.setter
+    def fps(self, value):
+        self._fps = value
+        self._lastFrame = None
+        if self._timer is not None:
+            self._renderWindow.removeTimer(self._timer)
+            self._timer = self._renderWindow.addTimer(self.tick, interval=max(1, int(1000.0 / self._fps)))
+
+    @property
+    def framesRendered(self):
+        return self._framesRendered
+
+    @property
+    def framesDropped(self):
+        return self._framesDropped
+
+class RenderStats:
+    '''Frame timing of a vtkRenderWindow and of each of its renderers from their Start and End events, 
+    with rolling frames per second, frame time percentiles and counts of actors and points 
+'''
+    def __init__(self, renderWindow, sinks=(), window=120, reportEvery=30):
+        '''
+    : renderWindow vtkRenderWindow 
+    : sinks objects with write(stats) called every reportEvery frames 
+    : window frames in the rolling statistics 
+'''
+        self._sinks = list(sinks)
+        self._window = window
+        self._reportEvery = reportEvery
+        self._starts = {}
+        self._frames = {}
+        self._renderers = []
+        self._numFrames = 0
+        self._watch(renderWindow)
+        self._renderWindow = renderWindow
+
+    def watch(self, renderer):
+        '''Time the renders of a vtkRenderer 
+'''
+        if renderer not in self._renderers:
+            self._renderers.append(renderer)
+            self._watch(renderer)
+
+    def _watch(self, source):
+        self._frames[source] = deque(maxlen=self._window)
+        source.AddObserver("StartEvent", self.startCallback)
+        source.AddObserver("EndEvent", self.endCallback)
+
+    def startCallback(self, source, eventString):
+        self._starts[source] = time.perf_counter()
+
+    def endCallback(self, source, eventString):
+        end = time.perf_counter()
+        start = self._starts.pop(source, None)
+        if start is None:
+            return
+        self._frames[source].append((end, end - start))
+        if source is self._renderWindow:
+            self._numFrames += 1
+            if self._sinks and self._numFrames % self._reportEvery == 0:
+                self.report()
+
+    def report(self):
+        '''Write the current statistics to every sink 
+'''
+        stats = self.stats()
+        for sink in self._sinks:
+            sink.write(stats)
+
+    def stats(self):
+        '''
+    : return list of statistics dictionaries, the window first then each renderer viewport 
+'''
+        stats = [self._summary('window', self._renderWindow, None)]
+        for index, renderer in enumerate(self._renderers):
+            stats.append(self._summary('renderer{}'.format(index), renderer, renderer))
+        return stats
+
+    def _summary(self, name, source, renderer):
+        frames = self._frames[source]
+        summary = {'time': time.time(), 'name': name, 'frames': len(frames), 'fps': 0.0,
+                   'frameTimeMean': 0.0, 'frameTimeP50': 0.0, 'frameTimeP90': 0.0, 'frameTimeP99': 0.0}
+        if frames:
+            ends, durations = np.array(frames).T
+            summary['frameTimeMean'] = float(durations.mean())
+            summary['frameTimeP50'], summary['frameTimeP90'], summary['frameTimeP99'] = \
+                (float(p) for p in np.percentile(durations, (50, 90, 99)))
+            if len(ends) > 1 and ends[-1] > ends[0]:
+                summary['fps'] = (len(ends) - 1) / float(ends[-1] - ends[0])
+        if renderer is None:
+            renderers = self._renderers
+            summary['viewport'] = (0.0, 0.0, 1.0, 1.0)
+        else:
+            renderers = [renderer]
+            summary['viewport'] = tuple(renderer.GetViewport())
+        summary['actors'], summary['points'] = _countActorsPoints(renderers)
+        return summary
+
+    @property
+    def sinks(self):
+        return self._sinks
+
+    @property
+    def numFrames(self):
+        return self._numFrames
+
+def _countActorsPoints(renderers):
+    '''Visible actors and the points of their mapper inputs 
+'''
+    numActors = 0
+    numPoints = 0
+    for renderer in renderers:
+        actors = renderer.GetActors()
+        actors.InitTraversal()
+        for _ in range(actors.GetNumberOfItems()):
+            actor = actors.GetNextActor()
+            if not actor.GetVisibility():
+                continue
+            numActors += 1
+            mapper = actor.GetMapper()
+            data = mapper.GetInput() if mapper else None
+            if data:
+                numPoints += data.GetNumberOfPoints()
+    return numActors, numPoints
+
+class LogStatsSink:
+    '''Write render statistics to a logger 
+'''
+    def __init__(self, logger=None, level=logging.INFO):
+        self._logger = logger if logger else logging.getLogger('kanvas.render')
+        self._level = level
+
+    def write(self, stats):
+        for s in stats:
+            self._logger.log(self._level, "%s viewport=%s fps=%.1f frame mean=%.2f ms p50=%.2f ms p90=%.2f ms "
+                             "p99=%.2f ms actors=%d points=%d", s['name'], s['viewport'], s['fps'],
+                             1000 * s['frameTimeMean'], 1000 * s['frameTimeP50'], 1000 * s['frameTimeP90'],
+                             1000 * s['frameTimeP99'], s['actors'], s['points'])
+
+class CsvStatsSink:
+    '''Append render statistics to a CSV file, one row per window or renderer per report 
+'''
+    FIELDS = ('time', 'name', 'viewport', 'frames', 'fps', 'frameTimeMean', 'frameTimeP50', 'frameTimeP90',
+              'frameTimeP99', 'actors', 'points')
+
+    def __init__(self, filename):
+        self._file = open(filename, 'w', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.FIELDS)
+        self._writer.writeheader()
+
+    def write(self, stats):
+        for s in stats:
+            row = dict(s)
+            row['viewport'] = ' '.join(str(v) for v in s['viewport'])
+            self._writer.writerow(row)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
 class Actor:
     '''Default parameters for an actor 
 '''
@@ -159,11 +787,15 @@ class Actor:
 '''
         self._mapper = vtk.vtkPolyDataMapper()
         self._source = source
-        if type(self._source) == vtk.vtkPolyData:
+        if isinstance(self._source, vtk.vtkPolyData):
             self._mapper.SetInputData(self._source )
             self._mapper.SetColorModeToDefault()
             self._mapper.SetScalarRange(zMin, zMax)
             self._mapper.SetScalarVisibility(1)
+            scalars = self._source.GetPointData().GetScalars()
+            if scalars is not None and scalars.GetName() == 'DepthArray' and scalars.GetNumberOfComponents() == 3:
+                # compact point data uses its points as scalars, colour by the z component 
+                self._mapper.SetArrayComponent(2)
         else:
             self._mapper.SetInputConnection(self._source.GetOutputPort())
         self._actor = vtk.vtkActor()
@@ -227,7 +859,7 @@ class Renderer:
     def addCallback(self, callback, event="StartEvent"):
         '''Add a callback function 
 '''
-        self._renderer.AddObserver("StartEvent", callback)
+        return self._renderer.AddObserver(event, callback)
         
     @property
     def renderer(self):
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+
+#=========================================================================
+#
+#  Copyright (c) 2018  Karl T. Diedrich, PhD
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#=========================================================================*/
+
+
+'''Surfaces from expression strings like "k*(x**2 + y**2) + c", compiled once into vectorized NumPy kernels.
+: author Karl T. Diedrich, PhD <ktdiedrich@gmail.com>
+'''
+
+import ast
+from functools import lru_cache
+import numpy as np
+
+
+FUNCTIONS = {
+    'abs': np.abs, 'sqrt': np.sqrt, 'exp': np.exp, 'log': np.log, 'log10': np.log10, 'log2': np.log2,
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan, 'arcsin': np.arcsin, 'arccos': np.arccos, 'arctan': np.arctan,
+    'arctan2': np.arctan2, 'sinh': np.sinh, 'cosh': np.cosh, 'tanh': np.tanh, 'hypot': np.hypot,
+    'floor': np.floor, 'ceil': np.ceil, 'sign': np.sign, 'minimum': np.minimum, 'maximum': np.maximum,
+    'where': np.where, 'clip': np.clip,
+}
+
+CONSTANTS = {'pi': np.pi, 'e': np.e}
+
+VARIABLES = ('x', 'y')
+
+_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.UAdd, ast.USub,
+              ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq)
+
+_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call, ast.Name, ast.Load, ast.Constant) + \
+    _OPERATORS
+
+
+class _FloatConstants(ast.NodeTransformer):
+    '''Make integer literals floats so powers like 9**9**9 overflow at once instead of growing Python integers
+'''
+    def visit_Constant(self, node):
+        return ast.copy_location(ast.Constant(float(node.value)), node)
+
+
+@lru_cache(maxsize=256)
+def compileExpression(text):
+    '''Parse and validate an expression once, kernels are cached by expression text
+    : return (code object, tuple of parameter names)
+'''
+    try:
+        tree = ast.parse(text.strip(), mode='eval')
+    except SyntaxError as error:
+        raise ValueError("Invalid expression {!r}: {}".format(text, error.msg))
+    names = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, _NODES):
+            raise ValueError("{} is not allowed in expression {!r}".format(type(node).__name__, text))
+        if isinstance(node, ast.Constant) and (isinstance(node.value, bool) or
+                                               not isinstance(node.value, (int, float))):
+            raise ValueError("Only number constants are allowed in expression {!r}".format(text))
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+                raise ValueError("Only calls of {} with positional arguments are allowed in expression {!r}".format(
+                    ', '.join(sorted(FUNCTIONS)), text))
+        elif isinstance(node, ast.Name) and node.id not in FUNCTIONS:
+            names.add(node.id)
+    tree = ast.fix_missing_locations(_FloatConstants().visit(tree))
+    parameters = tuple(sorted(names - set(VARIABLES) - set(CONSTANTS)))
+    return compile(tree, '<expression {}>'.format(text), 'eval'), parameters
+
+
+class Expression:
+    '''Vectorized function z = f(x, y) of an expression string and its parameters. Picklable, so it can be
+    evaluated by process pools; the kernel is compiled again from the cache on unpickling.
+'''
+    def __init__(self, text, **params):
+        '''
+    : text expression of x, y, parameters, the FUNCTIONS and the CONSTANTS pi and e
+    : params values of the other names in the expression
+'''
+        self._text = text
+        self._code, self._parameters = compileExpression(text)
+        missing = [name for name in self._parameters if name not in params]
+        if missing:
+            raise ValueError("Expression {!r} needs values of {}".format(text, ', '.join(missing)))
+        unused = [name for name in params if name not in self._parameters]
+        if unused:
+            raise ValueError("Expression {!r} does not use {}".format(text, ', '.join(unused)))
+        self._params = dict(params)
+        self._namespace = {'__builtins__': {}}
+        self._namespace.update(FUNCTIONS)
+        self._namespace.update(CONSTANTS)
+        self._namespace.update(self._params)
+
+    def __call__(self, x, y):
+        namespace = dict(self._namespace)
+        namespace['x'] = np.asarray(x, dtype=np.float64)
+        namespace['y'] = np.asarray(y, dtype=np.float64)
+        return eval(self._code, namespace)
+
+    def withParams(self, **params):
+        '''New expression of the same cached kernel with some parameters changed, e.g. for parameter sweeps
+'''
+        values = dict(self._params)
+        values.update(params)
+        return Expression(self._text, **values)
+
+    def __getstate__(self):
+        return {'text': self._text, 'params': self._params}
+
+    def __setstate__(self, state):
+        self.__init__(state['text'], **state['params'])
+
+    def __repr__(self):
+        return "Expression({!r}{})".format(self._text, ''.join(
+            ', {}={!r}'.format(name, value) for name, value in sorted(self._params.items())))
+
+    @property
+    def text(self):
+        return self._text
+
+    @property
+    def parameters(self):
+        return self._parameters
+
+    @property
+    def params(self):
+        return dict(self._params)
+
+
+def surfaceFunction(functZ, params=None):
+    '''
+    : functZ function of x, y or expression string
+    : params parameter values of an expression string
+    : return callable z = f(x, y)
+'''
+    if isinstance(functZ, str):
+        return Expression(functZ, **(params if params else {}))
+    if params:
+        raise ValueError("params are only used with expression strings")
+    return functZ
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+
+#=========================================================================
+#
+#  Copyright (c) 2018  Karl T. Diedrich, PhD
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#=========================================================================*/
+
+
+'''Voxel-grid levels of detail for large point clouds.
+: author Karl T. Diedrich, PhD <ktdiedrich@gmail.com>
+'''
+
+import numpy as np
+from kanvas.plot import PointData, VtkPointCloud, makeExtent
+
+
+def voxelDownsample(points, voxelSize, origin=None):
+    '''Replace the points of each occupied voxel by their centroid. Keeps spatial coverage,
+    every occupied voxel keeps one point.
+    : points (N, 3) array
+    : voxelSize edge length of the cubic voxels
+    : origin corner of the voxel grid, the minimum of the points when None
+    : return (M, 3) array of centroids, M occupied voxels
+'''
+    points = np.asarray(points)
+    if len(points) == 0:
+        return points.copy()
+    if origin is None:
+        origin = points.min(axis=0)
+    keys = np.floor((points - origin) / voxelSize).astype(np.int64)
+    keys -= keys.min(axis=0)
+    dims = keys.max(axis=0) + 1
+    if float(dims[0]) * float(dims[1]) * float(dims[2]) < 2**62:
+        linear = (keys[:, 0] * dims[1] + keys[:, 1]) * dims[2] + keys[:, 2]
+        _, inverse, counts = np.unique(linear, return_inverse=True, return_counts=True)
+    else:
+        _, inverse, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()
+    centroids = np.empty((len(counts), 3), dtype=points.dtype)
+    for axis in range(3):
+        centroids[:, axis] = np.bincount(inverse, weights=points[:, axis], minlength=len(counts)) / counts
+    return centroids
+
+
+class PointCloudLOD:
+    '''Levels of detail of a point cloud, level 0 the full cloud then voxel grids of growing voxel size,
+    each level at most half the points of the level before
+'''
+    def __init__(self, points, voxelSize=None, minPoints=10000, maxLevels=12):
+        '''
+    : points (N, 3) array or PointData of the full resolution cloud
+    : voxelSize voxel size of level 1, 1/1024 of the largest side of the extent when None
+    : minPoints stop adding levels once a level has at most minPoints points
+    : maxLevels most levels including level 0
+'''
+        if isinstance(points, PointData):
+            full = points
+        else:
+            points = np.asarray(points)
+            full = PointData(maxNumPoints=max(1e6, len(points)))
+            full.addPoints(points)
+        extent = makeExtent(full.points)
+        if full.extent is None and full is not points:
+            full.extent = extent
+        # coarse levels colour like the full cloud, by the caller's extent when it has one
+        levelExtent = full.extent if full.extent else extent
+        size = max(extent.maxX - extent.minX, extent.maxY - extent.minY, extent.maxZ - extent.minZ, 1e-12)
+        self._voxelSizes = [0.0]
+        self._levels = [full]
+        voxelSize = voxelSize if voxelSize else size / 1024.0
+        origin = np.array((extent.minX, extent.minY, extent.minZ))
+        coarse = full.points
+        while len(self._levels) < maxLevels and len(coarse) > minPoints:
+            downsampled = voxelDownsample(coarse, voxelSize, origin=origin)
+            # levels barely smaller than the one before would cost memory without saving draw time
+            if len(downsampled) <= len(coarse) // 2:
+                level = PointData(maxNumPoints=max(1e6, len(downsampled)))
+                level.addPoints(downsampled)
+                level.extent = levelExtent
+                self._levels.append(level)
+                self._voxelSizes.append(voxelSize)
+                coarse = downsampled
+            voxelSize *= 2.0
+
+    def levelForBudget(self, pointBudget):
+        '''
+    : return finest level with at most pointBudget points, the coarsest level when none fits
+'''
+        for level, pointData in enumerate(self._levels):
+            if pointData.numberOfPoints <= pointBudget:
+                return level
+        return len(self._levels) - 1
+
+    def levelForDistance(self, distance, nearDistance):
+        '''Full resolution within nearDistance of the camera, one level coarser for each doubling of distance
+'''
+        if distance <= nearDistance:
+            return 0
+        return int(min(np.floor(np.log2(distance / nearDistance)) + 1, len(self._levels) - 1))
+
+    @property
+    def levels(self):
+        return self._levels
+
+    @property
+    def voxelSizes(self):
+        return self._voxelSizes
+
+    @property
+    def numLevels(self):
+        return len(self._levels)
+
+
+class LODPointCloud(VtkPointCloud):
+    '''Point cloud actor switching between voxel-grid levels of detail by point budget and camera distance
+'''
+    def __init__(self, points, zMin=-10.0, zMax=10.0, pointBudget=1e6, nearDistance=None, voxelSize=None,
+                 minPoints=10000):
+        '''
+    : points (N, 3) array or PointData of the full resolution cloud
+    : pointBudget most points drawn
+    : nearDistance camera distance of full resolution, levels only follow the point budget when None
+'''
+        self._lod = PointCloudLOD(points, voxelSize=voxelSize, minPoints=minPoints)
+        self._pointBudget = pointBudget
+        self._nearDistance = nearDistance
+        self._level = None
+        VtkPointCloud.__init__(self, zMin=zMin, zMax=zMax, pointData=self._lod.levels[0])
+        self.setLevel(self._lod.levelForBudget(pointBudget))
+
+    def setLevel(self, level):
+        '''Draw a level of detail
+'''
+        if level != self._level:
+            self._level = level
+            self._pointData = self._lod.levels[level]
+            self._mapper.SetInputData(self._pointData.vtkPolyData)
+
+    def updateLevel(self, camera=None):
+        '''Choose the level from the point budget and the camera distance to the cloud
+'''
+        level = self._lod.levelForBudget(self._pointBudget)
+        if camera and self._nearDistance:
+            distance = np.linalg.norm(np.array(camera.GetPosition()) - np.array(self._vtkActor.GetCenter()))
+            level = max(level, self._lod.levelForDistance(distance, self._nearDistance))
+        self.setLevel(level)
+
+    def attach(self, renderer):
+        '''Add to a kanvas Renderer and update the level before each render of it
+'''
+        renderer.addActor(self._vtkActor)
+        renderer.renderer.AddObserver("StartEvent", self.levelCallback)
+
+    def levelCallback(self, vtkRenderer, eventString):
+        self.updateLevel(vtkRenderer.GetActiveCamera())
+
+    def addPoint(self, point):
+        raise RuntimeError("LODPointCloud levels are built once, rebuild it with the new points")
+
+    def addPoints(self, points, deep=False):
+        raise RuntimeError("LODPointCloud levels are built once, rebuild it with the new points")
+
+    @property
+    def lod(self):
+        return self._lod
+
+    @property
+    def level(self):
+        return self._level
+
+    @property
+    def pointBudget(self):
+        return self._pointBudget
+
+    @pointBudget.setter
+    def pointBudget(self, value):
+        self._pointBudget = value
+        self.updateLevel()
+
+    @property
+    def nearDistance(self):
+        return self._nearDistance
+
+    @nearDistance.setter
+    def nearDistance(self, value):
+        self._nearDistance = value
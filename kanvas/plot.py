@@ -19,11 +19,21 @@
 #=========================================================================*/
 
 
+import contextlib
+import itertools
+import multiprocessing
+import multiprocessing.pool
+import os
+import queue
+import struct
+import time
 import vtk
 import numpy as np
+from vtk.util import numpy_support
 from kanvas.canvas import Renderer, RenderWindow, Box, Actor 
+from kanvas.expression import surfaceFunction
 from kanvas.shapes import parabola3D, ArrowFactory
-from kanvas.transform import Rotation, rotation, xRotation, yRotation, zRotation
+from kanvas.transform import Rotation, Transform, rotation, xRotation, yRotation, zRotation
 
 '''Plot points in 3D 
 
@@ -79,7 +89,7 @@ class Extent:
     @minZ.setter
     def minZ(self, value):
         if value < self._minZ:
-            self._minY = value
+            self._minZ = value
     @property
     def maxZ(self):
         return self._maxZ
@@ -87,38 +97,295 @@ class Extent:
     def maxZ(self, value):
         if value > self._maxZ:
             self._maxZ = value
+
+def makeExtent(points):
+    '''Extent of an (N, 3) array of points with min/max reductions 
+'''
+    if len(points) == 0:
+        return Extent()
+    minXYZ = points.min(axis=0)
+    maxXYZ = points.max(axis=0)
+    return Extent(minX0=minXYZ[0], maxX0=maxXYZ[0], minY0=minXYZ[1], maxY0=maxXYZ[1],
+                  minZ0=minXYZ[2], maxZ0=maxXYZ[2])
    
+# Binary point data file: fixed-size header, x, y, z rows, then scalars 
+_BINARY_MAGIC = b'KANVASPC'
+_BINARY_VERSION = 1
+_BINARY_HEADER = struct.Struct('<8sIIIIQ6d')
+_BINARY_HEADER_SIZE = 128
+
+def _lastOccurrence(ids):
+    '''Unique ids with the position of their last occurrence, so replacing in order keeps the last value 
+'''
+    reversedIds = ids[::-1]
+    unique, first = np.unique(reversedIds, return_index=True)
+    return unique, len(ids) - 1 - first
+
+def _appendTuples(vtkArray, values):
+    '''Append rows of values to a VTK data array in one copy through a NumPy view of its buffer 
+    : vtkArray VTK data array grown in place 
+    : values array with one row per tuple 
+    : return index of the first appended tuple 
+'''
+    begin = vtkArray.GetNumberOfTuples()
+    vtkArray.SetNumberOfTuples(begin + len(values))
+    view = numpy_support.vtk_to_numpy(vtkArray)
+    view[begin:] = values
+    return begin
+
 class PointData:
-    def __init__(self, maxNumPoints=1e6):
+    def __init__(self, maxNumPoints=1e6, spatialIndex=None, sampling='random', seed=None, verts=True,
+                 dtype=np.float64):
         '''Points of data kept in class object separate of mapper and actor. 
+    : spatialIndex optional Octree kept up to date as points are added 
+    : sampling what happens to points after maxNumPoints, 'random' overwrites a random point, 
+    'reservoir' keeps a uniform random sample of every point seen 
+    : seed random generator seed 
+    : verts keep a vertex cell per point for vtkPolyDataMapper, without them only mappers drawing 
+    points directly, like VtkPointCloud(renderMode='splats'), show the data 
+    : dtype np.float64 or np.float32 point storage. float32 is the compact mode, it also keeps no depth copy, 
+    the points array is the scalars and VtkPointCloud colours by its z component 
 '''
+        if sampling not in ('random', 'reservoir'):
+            raise ValueError("Unknown sampling {}, use 'random' or 'reservoir'".format(sampling))
         self._maxNumPoints = maxNumPoints
+        self._sampling = sampling
+        self._verts = verts
+        self._dtype = np.dtype(dtype)
+        if self._dtype not in (np.float32, np.float64):
+            raise ValueError("Unsupported point dtype {}, use float32 or float64".format(self._dtype))
+        self._depthFromPoints = self._dtype == np.float32
+        self._rng = np.random.default_rng(seed)
+        self._batchDepth = 0
+        self._pendingModified = False
         self._vtkPolyData = vtk.vtkPolyData()
+        self._spatialIndex = spatialIndex
         self.clearPoints()
         self._extent = None
         
     def addPoint(self, point):
         if self._vtkPoints.GetNumberOfPoints() < self._maxNumPoints:
             pointId = self._vtkPoints.InsertNextPoint(point[:])
-            self._vtkDepth.InsertNextValue(point[2])
-            self._vtkCells.InsertNextCell(1)
-            self._vtkCells.InsertCellPoint(pointId)
+            if not self._depthFromPoints:
+                self._vtkDepth.InsertNextValue(point[2])
+            if self._verts:
+                self._vtkCells.InsertNextCell(1)
+                self._vtkCells.InsertCellPoint(pointId)
+            if self._spatialIndex is not None:
+                self._spatialIndex.insert(pointId, point)
         else:
-            r = np.random.randint(0, self._maxNumPoints)
-            self._vtkPoints.SetPoint(r, point[:])
+            ids, _ = self._overflowIds(1)
+            if len(ids):
+                self._replacePoints(ids, np.asarray(point, dtype=self._dtype)[np.newaxis, :3])
+        self._numSeen += 1
+        self._modified()
+
+    def addPoints(self, points, deep=False):
+        '''Add a batch of points in one vectorized pass with one pipeline invalidation. 
+    : points (N, 3) array of x, y, z rows 
+    : deep copy points into VTK, otherwise the buffer of the first batch into empty point data is shared with VTK 
+    until points are replaced, the shared buffer is copied before it would be written 
+'''
+        points = np.ascontiguousarray(points, dtype=self._dtype)
+        if points.ndim != 2 or points.shape[1] != 3:
+            raise ValueError("addPoints expects an (N, 3) array, got shape {}".format(points.shape))
+        numPoints = self._vtkPoints.GetNumberOfPoints()
+        numFit = int(max(0, min(len(points), self._maxNumPoints - numPoints)))
+        if numFit:
+            newPoints = points[:numFit]
+            depth = None if self._depthFromPoints else np.ascontiguousarray(newPoints[:, 2], dtype=np.float64)
+            ids = np.arange(numPoints, numPoints + numFit, dtype=np.int64)
+            if numPoints == 0 and self._verts:
+                self._setArrays(newPoints, depth, np.arange(numFit + 1, dtype=np.int64), ids, deep=deep)
+            elif numPoints == 0:
+                self._setArrays(newPoints, depth, np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int64),
+                                deep=deep)
+            if numPoints == 0:
+                self._sharedPoints = not deep
+            else:
+                _appendTuples(self._vtkPoints.GetData(), newPoints)
+                if depth is not None:
+                    _appendTuples(self._vtkDepth, depth)
+                if self._verts:
+                    _appendTuples(self._vtkCells.GetConnectivityArray(), ids)
+                    _appendTuples(self._vtkCells.GetOffsetsArray(), ids + 1)
+            if self._spatialIndex is not None:
+                self._spatialIndex.insert(ids, newPoints)
+        self._numSeen += numFit
+        overflow = points[numFit:]
+        if len(overflow):
+            ids, positions = self._overflowIds(len(overflow))
+            if len(ids):
+                self._replacePoints(ids, overflow[positions])
+            self._numSeen += len(overflow)
+        self._modified()
+
+    def _overflowIds(self, count):
+        '''Ids overwritten by the next count points seen once point data is full 
+    : return (unique ids, positions of the points written to them) 
+'''
+        if self._sampling == 'reservoir':
+            # Algorithm R: point i of the stream replaces a random id in [0, i] when it is below the capacity 
+            seen = self._numSeen + np.arange(count, dtype=np.int64)
+            ids = self._rng.integers(0, seen + 1)
+            positions = np.nonzero(ids < self._maxNumPoints)[0]
+            ids = ids[positions]
+        else:
+            ids = self._rng.integers(0, int(self._maxNumPoints), size=count)
+            positions = np.arange(count)
+        ids, last = _lastOccurrence(ids)
+        return ids, positions[last]
+
+    def _replacePoints(self, ids, points):
+        '''Overwrite existing points and their depth, ids unique 
+'''
+        if self._sharedPoints:
+            # never write into the buffer of the caller 
+            self._vtkPoints.SetData(numpy_support.numpy_to_vtk(self.points, deep=True))
+            if self._depthFromPoints:
+                self._setDepthArray(self._vtkPoints.GetData())
+            self._sharedPoints = False
+        view = numpy_support.vtk_to_numpy(self._vtkPoints.GetData())
+        if self._spatialIndex is not None:
+            self._spatialIndex.update(ids, view[ids], points)
+        view[ids] = points
+        if not self._depthFromPoints:
+            numpy_support.vtk_to_numpy(self._vtkDepth)[ids] = points[:, 2]
+
+    def _setArrays(self, points, depth, offsets, connectivity, deep=False):
+        '''Replace the VTK arrays by arrays wrapping the NumPy buffers. 
+    : depth depth scalars, None uses the points array as scalars 
+'''
+        self._vtkPoints.SetData(numpy_support.numpy_to_vtk(points, deep=deep))
+        self._vtkCells.SetData(numpy_support.numpy_to_vtkIdTypeArray(offsets, deep=deep),
+                               numpy_support.numpy_to_vtkIdTypeArray(connectivity, deep=deep))
+        self._depthFromPoints = depth is None
+        self._setDepthArray(self._vtkPoints.GetData() if depth is None else numpy_support.numpy_to_vtk(depth, deep=deep))
+        # VTK does not own shared buffers, keep them alive while they are in use 
+        self._buffers = (points, depth, offsets, connectivity)
+
+    def _setDepthArray(self, array):
+        self._vtkDepth = array
+        self._vtkDepth.SetName('DepthArray')
+        self._vtkPolyData.GetPointData().SetScalars(self._vtkDepth)
+
+    @contextlib.contextmanager
+    def batch(self):
+        '''Defer pipeline invalidation of the points added in the with block to one at its end, 
+    e.g. with pointData.batch(): for point in points: pointData.addPoint(point) 
+'''
+        self._batchDepth += 1
+        try:
+            yield self
+        finally:
+            self._batchDepth -= 1
+            if self._batchDepth == 0 and self._pendingModified:
+                self._modified()
+
+    def _modified(self):
+        '''Invalidate the pipeline once for changed points, cells and depth 
+'''
+        if self._batchDepth:
+            self._pendingModified = True
+            return
+        self._pendingModified = False
         self._vtkCells.Modified()
         self._vtkPoints.Modified()
         self._vtkDepth.Modified()
  
     def clearPoints(self):
         self._vtkPoints = vtk.vtkPoints()
+        if self._dtype == np.float32:
+            self._vtkPoints.SetDataTypeToFloat()
+        else:
+            self._vtkPoints.SetDataTypeToDouble()
         self._vtkCells = vtk.vtkCellArray()
-        self._vtkDepth = vtk.vtkDoubleArray()
-        self._vtkDepth.SetName('DepthArray')
+        self._buffers = None
+        self._sharedPoints = False
+        self._numSeen = 0
+        if self._spatialIndex is not None:
+            self._spatialIndex.clear()
         self._vtkPolyData.SetPoints(self._vtkPoints)
         self._vtkPolyData.SetVerts(self._vtkCells)
-        self._vtkPolyData.GetPointData().SetScalars(self._vtkDepth)
-        self._vtkPolyData.GetPointData().SetActiveScalars('DepthArray')
+        self._depthFromPoints = self._dtype == np.float32
+        self._setDepthArray(self._vtkPoints.GetData() if self._depthFromPoints else vtk.vtkDoubleArray())
+
+    def save(self, filename):
+        '''Save points, scalars and extent in the binary format read by loadPointData. 
+    Points are written as float32 or float64 as stored, scalars as stored. 
+'''
+        points = numpy_support.vtk_to_numpy(self._vtkPoints.GetData()) if self.numberOfPoints else \
+            np.empty((0, 3), dtype=np.float64)
+        if points.dtype not in (np.float32, np.float64):
+            points = points.astype(np.float64)
+        scalarArray = self._vtkPolyData.GetPointData().GetScalars()
+        # depth read from the points is derived again by loadPointData 
+        scalars = numpy_support.vtk_to_numpy(scalarArray) if scalarArray and scalarArray.GetNumberOfTuples() \
+            and not self._depthFromPoints else np.empty(0, dtype=points.dtype)
+        if scalars.dtype not in (np.float32, np.float64):
+            scalars = scalars.astype(np.float64)
+        extent = self._extent if self._extent else makeExtent(points)
+        header = _BINARY_HEADER.pack(_BINARY_MAGIC, _BINARY_VERSION, points.dtype.itemsize,
+                                     scalars.dtype.itemsize if len(scalars) else 0, 0, len(points),
+                                     extent.minX, extent.maxX, extent.minY, extent.maxY, extent.minZ, extent.maxZ)
+        with open(filename, 'wb') as binaryFile:
+            binaryFile.write(header.ljust(_BINARY_HEADER_SIZE, b'\0'))
+            np.ascontiguousarray(points).tofile(binaryFile)
+            if len(scalars):
+                np.ascontiguousarray(scalars).tofile(binaryFile)
+
+    @property
+    def numberOfPoints(self):
+        return self._vtkPoints.GetNumberOfPoints()
+
+    @property
+    def numSeen(self):
+        '''Points added since the last clearPoints, including those not retained 
+'''
+        return self._numSeen
+
+    @property
+    def numRetained(self):
+        return self.numberOfPoints
+
+    @property
+    def sampling(self):
+        return self._sampling
+
+    @property
+    def verts(self):
+        return self._verts
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    @property
+    def depthFromPoints(self):
+        '''True when the scalars are the points array and depth is its z component 
+'''
+        return self._depthFromPoints
+
+    @property
+    def points(self):
+        '''(N, 3) NumPy view of the VTK points 
+'''
+        if self.numberOfPoints == 0:
+            return np.empty((0, 3))
+        return numpy_support.vtk_to_numpy(self._vtkPoints.GetData())
+
+    @property
+    def spatialIndex(self):
+        return self._spatialIndex
+
+    @spatialIndex.setter
+    def spatialIndex(self, value):
+        '''Set an Octree, or None, and index the existing points 
+'''
+        self._spatialIndex = value
+        if value is not None:
+            value.clear()
+            value.insert(np.arange(self.numberOfPoints), self.points)
 
     @property
     def vtkPolyData(self):
@@ -132,94 +399,730 @@ class PointData:
     def extent(self, value):
         self._extent = value 
 
+class RingPointData(PointData):
+    '''Fixed-capacity ring buffer of timestamped points for live streams. Buffers are allocated once, 
+    new points overwrite the oldest once capacity is reached and points older than the time window are 
+    evicted without reallocating or blanking the display. The ring is stored twice in a row so the live 
+    points are always one contiguous slice, VTK wraps only that slice and never sees unused or evicted slots. 
+'''
+    def __init__(self, capacity=100000, window=None, clock=time.monotonic):
+        '''
+    : capacity most points kept 
+    : window seconds points are kept, only capacity limits the points when None 
+    : clock function returning the time of points added without timestamps 
+'''
+        self._capacity = int(capacity)
+        self._window = window
+        self._clock = clock
+        self._queue = queue.Queue()
+        self._ring = np.zeros((2 * self._capacity, 3), dtype=np.float64)
+        self._ringDepth = np.zeros(2 * self._capacity, dtype=np.float64)
+        self._times = np.zeros(self._capacity, dtype=np.float64)
+        self._offsets = np.arange(self._capacity + 1, dtype=np.int64)
+        self._connectivity = np.arange(self._capacity, dtype=np.int64)
+        PointData.__init__(self, maxNumPoints=capacity)
+
+    def clearPoints(self):
+        '''Drop every point keeping the allocated arrays 
+'''
+        if not hasattr(self, '_head'):
+            PointData.clearPoints(self)
+        self._head = 0
+        self._count = 0
+        self._numSeen = 0
+        self._updateArrays()
+        self._modified()
+
+    def addPoint(self, point, timestamp=None):
+        self.addPoints(np.asarray(point, dtype=np.float64)[np.newaxis, :3], timestamp)
+
+    def addPoints(self, points, timestamps=None, deep=False):
+        '''Write a batch of points over the oldest ones 
+    : timestamps one time per point or one time for the batch, the clock when None 
+'''
+        points = np.asarray(points, dtype=np.float64)
+        if points.ndim != 2 or points.shape[1] != 3:
+            raise ValueError("addPoints expects an (N, 3) array, got shape {}".format(points.shape))
+        timestamps = np.broadcast_to(self._clock() if timestamps is None else timestamps, len(points))
+        self._numSeen += len(points)
+        if len(points) > self._capacity:
+            points = points[-self._capacity:]
+            timestamps = timestamps[-self._capacity:]
+        ids = (self._head + np.arange(len(points))) % self._capacity
+        for mirror in (ids, ids + self._capacity):
+            self._ring[mirror] = points
+            self._ringDepth[mirror] = points[:, 2]
+        self._times[ids] = timestamps
+        self._head = (self._head + len(points)) % self._capacity
+        self._count = min(self._count + len(points), self._capacity)
+        self._evictOld()
+        self._updateArrays()
+        self._modified()
+
+    def evict(self, now=None):
+        '''Drop points older than the window, the pipeline is only invalidated when points were dropped 
+    : return number of points evicted 
+'''
+        numEvicted = self._evictOld(now)
+        if numEvicted:
+            self._updateArrays()
+            self._modified()
+        return numEvicted
+
+    def _evictOld(self, now=None):
+        numEvicted = 0
+        if self._window is not None and self._count:
+            cutoff = (self._clock() if now is None else now) - self._window
+            numEvicted = int(np.searchsorted(self._times[self._liveIds()], cutoff, side='left'))
+            self._count -= numEvicted
+        return numEvicted
+
+    def enqueue(self, points, timestamps=None):
+        '''Queue points from a producer thread, drain adds them on the rendering thread 
+'''
+        self._queue.put((np.asarray(points, dtype=np.float64).reshape(-1, 3),
+                         self._clock() if timestamps is None else timestamps))
+
+    def drain(self):
+        '''Add every queued batch, e.g. from RenderWindow.addTimer(pointData.drain) 
+    : return True when points were added or evicted 
+'''
+        batches = []
+        while True:
+            try:
+                batches.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if not batches:
+            return self.evict() > 0
+        points = np.concatenate([batch[0] for batch in batches])
+        timestamps = np.concatenate([np.broadcast_to(batch[1], len(batch[0])) for batch in batches])
+        self.addPoints(points, timestamps)
+        return True
+
+    def _liveIds(self):
+        '''Ring ids of the live points, oldest first 
+'''
+        return (self._head - self._count + np.arange(self._count)) % self._capacity
+
+    def _liveSlice(self):
+        '''Slice of the live points in the mirrored ring, oldest first 
+'''
+        start = (self._head - self._count) % self._capacity
+        return slice(start, start + self._count)
+
+    def _updateArrays(self):
+        '''Wrap the live slice of the ring and its cells without copying 
+'''
+        live = self._liveSlice()
+        self._vtkPoints.SetData(numpy_support.numpy_to_vtk(self._ring[live], deep=False))
+        self._setDepthArray(numpy_support.numpy_to_vtk(self._ringDepth[live], deep=False))
+        offsets = self._offsets[:self._count + 1]
+        connectivity = self._connectivity[:self._count]
+        self._vtkCells.SetData(numpy_support.numpy_to_vtkIdTypeArray(offsets, deep=False),
+                               numpy_support.numpy_to_vtkIdTypeArray(connectivity, deep=False))
+        self._buffers = (offsets, connectivity)
+
+    @property
+    def numberOfPoints(self):
+        return self._count
+
+    @property
+    def points(self):
+        '''(N, 3) view of the live points, oldest first 
+'''
+        return self._ring[self._liveSlice()]
+
+    @property
+    def timestamps(self):
+        return self._times[self._liveIds()]
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def window(self):
+        return self._window
+
+    @window.setter
+    def window(self, value):
+        self._window = value
+
 class VtkPointCloud:
-    def __init__(self, zMin=-10.0, zMax=10.0, maxNumPoints=1e6):
-        self._pointData = PointData(maxNumPoints=maxNumPoints)
-        mapper = vtk.vtkPolyDataMapper()
-        mapper.SetInputData(self._pointData.vtkPolyData )
-        mapper.SetColorModeToDefault()
-        mapper.SetScalarRange(zMin, zMax)
-        mapper.SetScalarVisibility(1)
+    def __init__(self, zMin=-10.0, zMax=10.0, maxNumPoints=1e6, pointData=None, renderMode='vertices',
+                 pointSize=1.0, splatRadius=0.0, dtype=np.float64):
+        '''Actor of point data 
+    : pointData existing PointData to display, new PointData when None 
+    : renderMode 'vertices' draws the vertex cells of the points with a vtkPolyDataMapper, 
+    'splats' draws the points array directly with a vtkPointGaussianMapper and needs no cells, 
+    new PointData is then made without verts 
+    : pointSize point size in pixels 
+    : splatRadius world radius of the 'splats' sprites, one point of pointSize pixels each when 0 
+    : dtype point storage of new PointData, np.float32 halves the memory 
+'''
+        if renderMode not in ('vertices', 'splats'):
+            raise ValueError("Unknown renderMode {}, use 'vertices' or 'splats'".format(renderMode))
+        self._renderMode = renderMode
+        self._pointData = pointData if pointData else PointData(maxNumPoints=maxNumPoints,
+                                                                verts=renderMode == 'vertices', dtype=dtype)
+        if renderMode == 'splats':
+            self._mapper = vtk.vtkPointGaussianMapper()
+            self._mapper.SetScaleFactor(splatRadius)
+            self._mapper.SetEmissive(False)
+        else:
+            self._mapper = vtk.vtkPolyDataMapper()
+        self._mapper.SetInputData(self._pointData.vtkPolyData )
+        self._mapper.SetColorModeToDefault()
+        self._mapper.SetScalarRange(zMin, zMax)
+        self._mapper.SetScalarVisibility(1)
+        # colour points array scalars by z, one component depth scalars are mapped as they are 
+        self._mapper.SetArrayComponent(2)
         self._vtkActor = vtk.vtkActor()
-        self._vtkActor.SetMapper(mapper)
+        self._vtkActor.SetMapper(self._mapper)
+        self._vtkActor.GetProperty().SetPointSize(pointSize)
  
     def addPoint(self, point):
         self._pointData.addPoint(point)
+
+    def addPoints(self, points, deep=False):
+        '''Add an (N, 3) array of points in one batch 
+'''
+        self._pointData.addPoints(points, deep=deep)
  
     def clearPoints(self):
         self._pointData.clearPoints() 
 
+    @property
+    def pointData(self):
+        return self._pointData
+
+    @property
+    def mapper(self):
+        return self._mapper
+
+    @property
+    def renderMode(self):
+        return self._renderMode
+
+    @property
+    def pointSize(self):
+        return self._vtkActor.GetProperty().GetPointSize()
+
+    @pointSize.setter
+    def pointSize(self, value):
+        self._vtkActor.GetProperty().SetPointSize(value)
+
     @property
     def vtkActor(self):
         return self._vtkActor 
  
-def load_data(filename):
-    pointCloud = VtkPointCloud()
-    data = np.genfromtxt(filename,dtype=float,skip_header=0,usecols=[0,1,2], delimiter=',')
-    for k in range(np.size(data,0)):
-        point = data[k] #20*(random.rand(3)-0.5)
-        pointCloud.addPoint(point)
+def iterCsvChunks(filename, chunkSize=1000000, delimiter=',', usecols=(0, 1, 2), dtype=np.float64, skipHeader=0):
+    '''Read a delimited text file in fixed-size chunks of rows so memory stays bounded 
+    : chunkSize rows per chunk 
+    : usecols columns read in order 
+    : return generator of (rows, len(usecols)) arrays 
+'''
+    with open(filename) as csvFile:
+        for _ in range(skipHeader):
+            next(csvFile, None)
+        while True:
+            lines = list(itertools.islice(csvFile, chunkSize))
+            if not lines:
+                break
+            chunk = np.loadtxt(lines, delimiter=delimiter, usecols=usecols, dtype=dtype, ndmin=2)
+            if len(chunk):
+                yield chunk
+
+def printProgress(rows, rowsPerSecond):
+    '''Print load_data progress 
+'''
+    print("Loaded {} rows, {:.0f} rows/s".format(rows, rowsPerSecond))
+
+def load_data(filename, chunkSize=1000000, delimiter=',', usecols=(0, 1, 2), dtype=np.float64, skipHeader=0,
+              maxNumPoints=1e6, progress=None, renderMode='vertices'):
+    '''Stream x, y, z rows of a CSV file into a point cloud one chunk at a time 
+    : dtype parsed and stored point type, np.float32 halves the memory 
+    : progress function(rows, rowsPerSecond) called after each chunk, e.g. printProgress 
+    : renderMode VtkPointCloud render mode, 'splats' keeps no vertex cells 
+'''
+    pointCloud = VtkPointCloud(maxNumPoints=maxNumPoints, renderMode=renderMode, dtype=dtype)
+    rows = 0
+    start = time.perf_counter()
+    for chunk in iterCsvChunks(filename, chunkSize=chunkSize, delimiter=delimiter, usecols=usecols, dtype=dtype,
+                               skipHeader=skipHeader):
+        pointCloud.addPoints(chunk)
+        rows += len(chunk)
+        if progress:
+            progress(rows, rows / max(time.perf_counter() - start, 1e-9))
     return pointCloud
 
 
-def makePointCloudActor(xBegin, xEnd, yBegin, yEnd, functZ, step=1.0, dtype=np.float64):
+def loadPointData(filename, verts=True):
+    '''Memory-map a binary file written by PointData.save. 
+    Points and scalars are wrapped as VTK arrays without copying, pages are read on demand 
+    and copied only if written (copy-on-write). 
+    : verts build vertex cells, O(N); without them only mappers drawing points directly show the data 
+    : return PointData 
+'''
+    with open(filename, 'rb') as binaryFile:
+        header = binaryFile.read(_BINARY_HEADER_SIZE)
+    if len(header) < _BINARY_HEADER.size:
+        raise ValueError("{} is not a kanvas point data file".format(filename))
+    magic, version, pointSize, scalarSize, _, numPoints, minX, maxX, minY, maxY, minZ, maxZ = \
+        _BINARY_HEADER.unpack_from(header)
+    if magic != _BINARY_MAGIC:
+        raise ValueError("{} is not a kanvas point data file".format(filename))
+    if version != _BINARY_VERSION:
+        raise ValueError("{} has unsupported point data version {}".format(filename, version))
+    floatTypes = {4: np.float32, 8: np.float64}
+    pointData = PointData(maxNumPoints=max(1e6, numPoints), dtype=floatTypes[pointSize])
+    pointData.extent = Extent(minX0=minX, maxX0=maxX, minY0=minY, maxY0=maxY, minZ0=minZ, maxZ0=maxZ)
+    if numPoints == 0:
+        return pointData
+    points = np.memmap(filename, dtype=floatTypes[pointSize], mode='c', offset=_BINARY_HEADER_SIZE,
+                       shape=(numPoints, 3))
+    if scalarSize:
+        scalars = np.memmap(filename, dtype=floatTypes[scalarSize], mode='c',
+                            offset=_BINARY_HEADER_SIZE + points.nbytes, shape=(numPoints,))
+    else:
+        # depth is read from the z of the points 
+        scalars = None
+    pointData._verts = verts
+    if verts:
+        pointData._setArrays(points, scalars, np.arange(numPoints + 1, dtype=np.int64),
+                             np.arange(numPoints, dtype=np.int64))
+    else:
+        pointData._setArrays(points, scalars, np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int64))
+    return pointData
+
+def transformPoints(points, rotationMatrix):
+    '''Transform an (N, 3) array of points in place 
+    : rotationMatrix 3x3 rotation matrix, 4x4 homogeneous matrix or Transform, points unchanged when None 
+'''
+    if isinstance(rotationMatrix, Transform):
+        return rotationMatrix.apply(points, inPlace=True)
+    if type(rotationMatrix) == np.ndarray:
+        if rotationMatrix.shape == (4, 4):
+            return Transform(rotationMatrix).apply(points, inPlace=True)
+        return Rotation(rotationMatrix).rotate(points, inPlace=True)
+    return points
+
+def gridPoints(xBegin, xEnd, yBegin, yEnd, functZ, step=1.0, dtype=np.float64, vectorize=True, workers=1,
+               chunkSize=None, pool='process', params=None):
+    '''Evaluate functZ over the x, y grid 
+    : functZ function of x, y or expression string like "k*(x**2 + y**2) + c" compiled by kanvas.expression 
+    : params parameter values of an expression string 
+    : vectorize call functZ once on the whole grid, falls back to one call per point for scalar-only functions 
+    : workers, chunkSize, pool tiled parallel evaluation of expensive functions, see evaluateZ 
+    : return (N, 3) array of x, y, z points in the x then y order of nested loops 
+'''
+    x, y = np.meshgrid(np.arange(xBegin, xEnd, step), np.arange(yBegin, yEnd, step), indexing='ij')
+    x = x.ravel()
+    y = y.ravel()
+    functZ = surfaceFunction(functZ, params)
+    points = np.empty((len(x), 3), dtype=dtype)
+    points[:, 0] = x
+    points[:, 1] = y
+    points[:, 2] = evaluateZ(functZ, x, y, dtype=dtype, vectorize=vectorize, workers=workers, chunkSize=chunkSize,
+                             pool=pool)
+    return points
+
+def evaluateZ(functZ, x, y, dtype=np.float64, vectorize=True, workers=1, chunkSize=None, pool='process',
+              minParallelSeconds=1.0):
+    '''Evaluate functZ at the x, y arrays 
+    : vectorize call functZ once on the arrays, falls back to one call per point for scalar-only functions 
+    : workers processes or threads evaluating tiles of consecutive points, all CPUs when None, serial when 1 
+    : chunkSize points per tile, four tiles per worker when None 
+    : pool 'process' for functions holding the GIL, functZ must then be picklable, e.g. a module-level function, 
+    'thread' for functions releasing the GIL, or a _WorkerPool shared by several calls 
+    : minParallelSeconds the first tile is evaluated here, the rest is too when it predicts less time than this 
+    : return z array in the order of x and y 
+'''
+    if not isinstance(pool, _WorkerPool) and pool not in ('process', 'thread'):
+        raise ValueError("Unknown pool {}, use 'process' or 'thread'".format(pool))
+    workers = workers if workers else os.cpu_count()
+    if workers <= 1 or len(x) < 2:
+        return _evaluateTile(functZ, x, y, dtype, vectorize)
+    chunkSize = int(chunkSize) if chunkSize else int(np.ceil(len(x) / (4.0 * workers)))
+    start = time.perf_counter()
+    first = _evaluateTile(functZ, x[:chunkSize], y[:chunkSize], dtype, vectorize)
+    seconds = time.perf_counter() - start
+    rest = len(x) - len(first)
+    if rest == 0:
+        return first
+    if seconds * rest / len(first) < minParallelSeconds:
+        return np.concatenate((first, _evaluateTile(functZ, x[chunkSize:], y[chunkSize:], dtype, vectorize)))
+    tasks = [(functZ, x[begin:begin + chunkSize], y[begin:begin + chunkSize], dtype, vectorize)
+             for begin in range(chunkSize, len(x), chunkSize)]
+    if isinstance(pool, _WorkerPool):
+        tiles = pool.starmap(_evaluateTile, tasks)
+    else:
+        with _WorkerPool(pool, min(workers, len(tasks))) as workerPool:
+            tiles = workerPool.starmap(_evaluateTile, tasks)
+    return np.concatenate([first] + tiles)
+
+class _WorkerPool:
+    '''Process or thread pool started on first use, so evaluateZ calls that stay serial start no workers, 
+    and kept for every call sharing it until close 
+'''
+    def __init__(self, pool, workers):
+        self._pool = pool
+        self._workers = workers
+        self._workerPool = None
+
+    def starmap(self, func, tasks):
+        if self._workerPool is None:
+            if self._pool == 'thread':
+                self._workerPool = multiprocessing.pool.ThreadPool(self._workers)
+            else:
+                # spawn starts clean interpreters, forking a parent with running threads, e.g. VTK's or a 
+                # thread pool's, can deadlock the child on locks held at the fork 
+                self._workerPool = multiprocessing.get_context('spawn').Pool(self._workers)
+        return self._workerPool.starmap(func, tasks)
+
+    def close(self):
+        if self._workerPool is not None:
+            self._workerPool.close()
+            self._workerPool.join()
+            self._workerPool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def _evaluateTile(functZ, x, y, dtype, vectorize):
+    if vectorize:
+        try:
+            return np.broadcast_to(np.asarray(functZ(x, y), dtype=dtype), x.shape)
+        except (TypeError, ValueError):
+            pass
+    return np.array([functZ(xi, yi) for xi, yi in zip(x, y)], dtype=dtype)
+
+# corner, edge midpoint and center offsets of a quadtree cell in halves of its size 
+_CELL_SAMPLES = np.array([(0, 0), (2, 0), (0, 2), (2, 2), (1, 0), (0, 1), (2, 1), (1, 2), (1, 1)], dtype=np.int64)
+
+def adaptivePoints(xBegin, xEnd, yBegin, yEnd, functZ, tolerance=0.01, minStep=None, initialStep=None,
+                   pointBudget=1e6, dtype=np.float64, vectorize=True, workers=1, chunkSize=None, pool='process',
+                   params=None):
+    '''Sample functZ on a quadtree over the closed x, y domain, splitting cells where the surface deviates 
+    from linear interpolation of the cell corners by more than tolerance. Flat regions keep coarse cells. 
+    Cells are refined one level at a time with one functZ call per level, the levels share one worker pool. 
+    : tolerance largest z deviation of the edge midpoints and center from the interpolated corners 
+    : minStep smallest cell size, 1/1024 of initialStep when None 
+    : initialStep size of the starting cells, 1/8 of the largest side when None 
+    : pointBudget most points, the cells of largest deviation are split first once the budget is short 
+    : workers, chunkSize, pool tiled parallel evaluation of each level, see evaluateZ 
+    : params parameter values of an expression string functZ 
+    : return (N, 3) array of x, y, z points sorted by x then y 
+'''
+    functZ = surfaceFunction(functZ, params)
+    width = float(xEnd - xBegin)
+    height = float(yEnd - yBegin)
+    initialStep = initialStep if initialStep else max(width, height) / 8.0
+    minStep = minStep if minStep else initialStep / 1024.0
+    nx = max(1, int(np.ceil(width / initialStep)))
+    ny = max(1, int(np.ceil(height / initialStep)))
+    # integer lattice of the finest cells, every sample lies on it so shared samples are evaluated once 
+    maxDepth = max(1, int(np.ceil(np.log2(max(width / nx, height / ny) / minStep))) + 1)
+    unit = 2 ** maxDepth
+    numY = ny * unit + 1
+    ix, iy = np.meshgrid(np.arange(nx) * unit, np.arange(ny) * unit, indexing='ij')
+    cells = np.stack((ix.ravel(), iy.ravel()), axis=1)
+    keys = np.empty(0, dtype=np.int64)
+    zs = np.empty(0, dtype=dtype)
+    size = unit
+    if pool not in ('process', 'thread'):
+        raise ValueError("Unknown pool {}, use 'process' or 'thread'".format(pool))
+    workers = workers if workers else os.cpu_count()
+    with _WorkerPool(pool, workers) as workerPool:
+        while len(cells) and size >= 2:
+            samples = cells[:, np.newaxis, :] + _CELL_SAMPLES[np.newaxis, :, :] * (size // 2)
+            sampleKeys = samples[:, :, 0] * numY + samples[:, :, 1]
+            newKeys = np.setdiff1d(np.unique(sampleKeys), keys, assume_unique=True)
+            newX = xBegin + (newKeys // numY) * (width / (nx * unit))
+            newY = yBegin + (newKeys % numY) * (height / (ny * unit))
+            keys = np.concatenate((keys, newKeys))
+            zs = np.concatenate((zs, evaluateZ(functZ, newX, newY, dtype=dtype, vectorize=vectorize, workers=workers,
+                                               chunkSize=chunkSize, pool=workerPool)))
+            order = np.argsort(keys, kind='stable')
+            keys = keys[order]
+            zs = zs[order]
+            z = zs[np.searchsorted(keys, sampleKeys)]
+            corners = z[:, :4]
+            interpolated = np.stack(((corners[:, 0] + corners[:, 1]) / 2.0, (corners[:, 0] + corners[:, 2]) / 2.0,
+                                     (corners[:, 1] + corners[:, 3]) / 2.0, (corners[:, 2] + corners[:, 3]) / 2.0,
+                                     corners.mean(axis=1)), axis=1)
+            deviation = np.abs(z[:, 4:] - interpolated).max(axis=1)
+            split = np.nonzero(deviation > tolerance)[0]
+            # a split cell adds at most 16 samples: 4 centers and 12 edge midpoints of its children 
+            affordable = int(max(0, pointBudget - len(keys)) // 16)
+            if len(split) > affordable:
+                split = split[np.argsort(deviation[split])[::-1][:affordable]]
+            size //= 2
+            offsets = np.array(((0, 0), (1, 0), (0, 1), (1, 1)), dtype=np.int64) * size
+            cells = (cells[split][:, np.newaxis, :] + offsets[np.newaxis, :, :]).reshape(-1, 2)
+    points = np.empty((len(keys), 3), dtype=dtype)
+    points[:, 0] = xBegin + (keys // numY) * (width / (nx * unit))
+    points[:, 1] = yBegin + (keys % numY) * (height / (ny * unit))
+    points[:, 2] = zs
+    return points
+
+def makePointCloudActor(xBegin, xEnd, yBegin, yEnd, functZ, step=1.0, dtype=np.float64, vectorize=True):
     '''Generate range of points with the functZ function 
 '''
-    pointCloud = VtkPointCloud()
-    for x in np.arange(xBegin, xEnd, step):
-        for y in np.arange(yBegin, yEnd, step):
-            z = functZ(x, y)
-            point =  np.array((x, y, z), dtype=dtype)
-            pointCloud.addPoint(point)
+    pointCloud = VtkPointCloud(dtype=dtype)
+    pointCloud.addPoints(gridPoints(xBegin, xEnd, yBegin, yEnd, functZ, step=step, dtype=dtype,
+                                    vectorize=vectorize))
     return pointCloud
 
-def makePointData(xBegin, xEnd, yBegin, yEnd, functZ, step=1.0, dtype=np.float64, rotationMatrix=None):
-    pointData = PointData()
-    rotator = None
-    zBegin = functZ(xBegin, yBegin)
-    extent = Extent(minX0=xBegin, maxX0=xBegin, minY0=yBegin, maxY0=yBegin, minZ0=zBegin, maxZ0=zBegin)
-    if type(rotationMatrix) == np.ndarray:
-        rotator = Rotation(rotationMatrix)
-    for x in np.arange(xBegin, xEnd, step):
-        for y in np.arange(yBegin, yEnd, step):
-            z = functZ(x, y)
-            point =  np.array((x, y, z), dtype=dtype)
-            extent.minX = x
-            extent.maxX = x
-            extent.minY = y
-            extent.maxY = y
-            extent.minZ = z
-            extent.maxZ = z
-            if rotator:
-                point = rotator.rotate(point)
-            pointData.addPoint(point)
+def makePointData(xBegin, xEnd, yBegin, yEnd, functZ, step=None, dtype=np.float64, rotationMatrix=None,
+                  vectorize=True, tolerance=None, pointBudget=1e6, workers=1, chunkSize=None, pool='process',
+                  params=None):
+    '''Generate point data of the functZ surface. The extent is of the points before rotation. 
+    : step grid step, 1.0 when None 
+    : dtype evaluation and storage type of the points, np.float32 halves the memory 
+    : vectorize call functZ once on the whole grid, set False for functions of scalars only 
+    : tolerance sample adaptively with adaptivePoints, step is then the smallest cell size, 
+    the adaptivePoints default when None, uniform step grid when tolerance is None 
+    : pointBudget most points of adaptive sampling 
+    : workers, chunkSize, pool evaluate tiles of the grid in parallel for expensive functZ, see evaluateZ 
+    : params parameter values of an expression string functZ like "k*(x**2 + y**2) + c" 
+'''
+    if tolerance is None:
+        points = gridPoints(xBegin, xEnd, yBegin, yEnd, functZ, step=step if step else 1.0, dtype=dtype,
+                            vectorize=vectorize, workers=workers, chunkSize=chunkSize, pool=pool, params=params)
+    else:
+        points = adaptivePoints(xBegin, xEnd, yBegin, yEnd, functZ, tolerance=tolerance, minStep=step,
+                                pointBudget=pointBudget, dtype=dtype, vectorize=vectorize, workers=workers,
+                                chunkSize=chunkSize, pool=pool, params=params)
+    pointData = PointData(maxNumPoints=1e6 if tolerance is None else max(1e6, len(points)), dtype=dtype)
+    extent = makeExtent(points)
+    points = transformPoints(points, rotationMatrix)
+    pointData.addPoints(points)
     pointData.extent = extent 
     return pointData 
 
+class SurfaceData:
+    '''Triangle strip surface of a grid of points with shared vertices, per-vertex depth scalars and normals. 
+    Add its vtkPolyData with Renderer.addActorSource. 
+'''
+    def __init__(self, points, shape, extent=None):
+        '''
+    : points (N, 3) array of the grid points, row-major of shape 
+    : shape (rows, columns) of the grid, one strip is made between each pair of rows 
+    : extent extent of the surface, of the points when None 
+'''
+        points = np.ascontiguousarray(points)
+        rows, columns = shape
+        if len(points) != rows * columns:
+            raise ValueError("{} points do not make a {} by {} grid".format(len(points), rows, columns))
+        self._shape = (rows, columns)
+        self._extent = extent if extent else makeExtent(points)
+        ids = np.arange(rows * columns, dtype=np.int64).reshape(rows, columns)
+        connectivity = np.stack((ids[:-1], ids[1:]), axis=2).ravel()
+        offsets = np.arange(0, len(connectivity) + 1, 2 * columns, dtype=np.int64)
+        depth = np.ascontiguousarray(points[:, 2])
+        normals = _gridNormals(points.reshape(rows, columns, 3)).reshape(-1, 3)
+        self._vtkPoints = vtk.vtkPoints()
+        self._vtkPoints.SetData(numpy_support.numpy_to_vtk(points, deep=False))
+        self._vtkStrips = vtk.vtkCellArray()
+        self._vtkStrips.SetData(numpy_support.numpy_to_vtkIdTypeArray(offsets, deep=False),
+                                numpy_support.numpy_to_vtkIdTypeArray(connectivity, deep=False))
+        vtkDepth = numpy_support.numpy_to_vtk(depth, deep=False)
+        vtkDepth.SetName('DepthArray')
+        vtkNormals = numpy_support.numpy_to_vtk(normals, deep=False)
+        vtkNormals.SetName('Normals')
+        self._vtkPolyData = vtk.vtkPolyData()
+        self._vtkPolyData.SetPoints(self._vtkPoints)
+        self._vtkPolyData.SetStrips(self._vtkStrips)
+        self._vtkPolyData.GetPointData().SetScalars(vtkDepth)
+        self._vtkPolyData.GetPointData().SetNormals(vtkNormals)
+        # VTK does not own shared buffers, keep them alive while they are in use 
+        self._buffers = (points, offsets, connectivity, depth, normals)
+
+    @property
+    def numberOfPoints(self):
+        return self._vtkPoints.GetNumberOfPoints()
+
+    @property
+    def points(self):
+        '''(N, 3) NumPy view of the VTK points 
+'''
+        return self._buffers[0]
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def vtkPolyData(self):
+        return self._vtkPolyData
+
+    @property
+    def extent(self):
+        return self._extent
+
+    @extent.setter
+    def extent(self, value):
+        self._extent = value
+
+def _gridNormals(grid):
+    '''Unit normals of a (rows, columns, 3) grid of points from the cross product of its row and column tangents 
+'''
+    if grid.shape[0] < 2 or grid.shape[1] < 2:
+        return np.tile(np.array((0.0, 0.0, 1.0), dtype=grid.dtype), grid.shape[:2] + (1,))
+    normals = np.cross(np.gradient(grid, axis=0), np.gradient(grid, axis=1))
+    length = np.linalg.norm(normals, axis=2, keepdims=True)
+    return (normals / np.where(length > 0, length, 1.0)).astype(grid.dtype)
+
+def makeSurfaceData(xBegin, xEnd, yBegin, yEnd, functZ, step=1.0, dtype=np.float64, rotationMatrix=None,
+                    vectorize=True, workers=1, chunkSize=None, pool='process', params=None):
+    '''Generate the functZ surface as triangle strips of the step grid. The extent is of the points before rotation. 
+    : workers, chunkSize, pool tiled parallel evaluation of expensive functZ, see evaluateZ 
+    : params parameter values of an expression string functZ 
+    : return SurfaceData 
+'''
+    points = gridPoints(xBegin, xEnd, yBegin, yEnd, functZ, step=step, dtype=dtype, vectorize=vectorize,
+                        workers=workers, chunkSize=chunkSize, pool=pool, params=params)
+    shape = (len(np.arange(xBegin, xEnd, step)), len(np.arange(yBegin, yEnd, step)))
+    extent = makeExtent(points)
+    return SurfaceData(transformPoints(points, rotationMatrix), shape, extent=extent)
+
+class ParametricSurface:
+    '''Surface of vectorized x(s, t), y(s, t), z(s, t) functions over ranges of s and t 
+'''
+    def __init__(self, functX, functY, functZ, sRange=(0.0, 2*np.pi), tRange=(0.0, np.pi)):
+        '''
+    : functX, functY, functZ functions of arrays of s and t 
+    : sRange (begin, end) of s 
+    : tRange (begin, end) of t 
+'''
+        self._functX = functX
+        self._functY = functY
+        self._functZ = functZ
+        self._sRange = sRange
+        self._tRange = tRange
+
+    def points(self, step=.1, tStep=None, dtype=np.float64):
+        '''Sample the surface in one batched pass 
+    : step s step, and t step when tStep is None 
+    : return (N, 3) array of x, y, z points in the s then t order of nested loops 
+'''
+        s, t = np.meshgrid(np.arange(self._sRange[0], self._sRange[1], step),
+                           np.arange(self._tRange[0], self._tRange[1], step if tStep is None else tStep),
+                           indexing='ij')
+        s = s.ravel()
+        t = t.ravel()
+        points = np.empty((len(s), 3), dtype=dtype)
+        points[:, 0] = self._functX(s, t)
+        points[:, 1] = self._functY(s, t)
+        points[:, 2] = self._functZ(s, t)
+        return points
+
+    def makePointData(self, step=.1, tStep=None, dtype=np.float64, rotationMatrix=None):
+        '''Point data of the sampled surface, sized to keep every sample. The extent is of the points before rotation. 
+'''
+        points = self.points(step=step, tStep=tStep, dtype=dtype)
+        pointData = PointData(maxNumPoints=max(1e6, len(points)), dtype=dtype)
+        extent = makeExtent(points)
+        points = transformPoints(points, rotationMatrix)
+        pointData.addPoints(points)
+        pointData.extent = extent
+        return pointData
+
+    def makeSurfaceData(self, step=.1, tStep=None, dtype=np.float64, rotationMatrix=None):
+        '''Triangle strips of the sampled surface. The extent is of the points before rotation. 
+    : return SurfaceData 
+'''
+        points = self.points(step=step, tStep=tStep, dtype=dtype)
+        shape = (len(np.arange(self._sRange[0], self._sRange[1], step)),
+                 len(np.arange(self._tRange[0], self._tRange[1], step if tStep is None else tStep)))
+        extent = makeExtent(points)
+        return SurfaceData(transformPoints(points, rotationMatrix), shape, extent=extent)
+
+    @property
+    def sRange(self):
+        return self._sRange
+
+    @sRange.setter
+    def sRange(self, value):
+        self._sRange = value
+
+    @property
+    def tRange(self):
+        return self._tRange
+
+    @tRange.setter
+    def tRange(self, value):
+        self._tRange = value
+
+def sphereSurface(r):
+    '''Sphere of radius r, s around z axis and t from the +z pole 
+'''
+    return ParametricSurface(lambda s, t: r*np.cos(s)*np.sin(t),
+                             lambda s, t: r*np.sin(s)*np.sin(t),
+                             lambda s, t: r*np.cos(t),
+                             sRange=(0.0, 2*np.pi), tRange=(0.0, np.pi))
+
+def torusSurface(R, r):
+    '''Torus around the z axis with ring radius R and tube radius r, s around z axis and t around the tube 
+'''
+    return ParametricSurface(lambda s, t: (R + r*np.cos(t))*np.cos(s),
+                             lambda s, t: (R + r*np.cos(t))*np.sin(s),
+                             lambda s, t: r*np.sin(t),
+                             sRange=(0.0, 2*np.pi), tRange=(0.0, 2*np.pi))
+
+def cylinderSurface(r, height):
+    '''Cylinder of radius r around the z axis from z=0 to height, s around z axis and t along z 
+'''
+    return ParametricSurface(lambda s, t: r*np.cos(s),
+                             lambda s, t: r*np.sin(s),
+                             lambda s, t: t,
+                             sRange=(0.0, 2*np.pi), tRange=(0.0, height))
+
+def makeParametricPoints(functX, functY, functZ, sBegin, sEnd, tBegin, tEnd, step=.1, tStep=None,
+                         dtype=np.float64, rotationMatrix=None):
+    '''Point data of the parametric surface of vectorized functX(s, t), functY(s, t), functZ(s, t) 
+'''
+    surface = ParametricSurface(functX, functY, functZ, sRange=(sBegin, sEnd), tRange=(tBegin, tEnd))
+    return surface.makePointData(step=step, tStep=tStep, dtype=dtype, rotationMatrix=rotationMatrix)
+
 def makeSpherePoints(r, step=.1, dtype=np.float64):
-    '''
-'''
-    from math import pi, sin, cos  
-    pointData = PointData()
-    for s in np.arange(0, 2*pi, step):
-        for t in np.arange(0, pi, step):
-            x = r*cos(s)*sin(t)
-            y = r*sin(s)*sin(t)
-            z = r*cos(t)
-            point = np.array((x,y,z), dtype=dtype)
-            pointData.addPoint(point)
-    return pointData 
+    '''Point data of a sphere of radius r 
+'''
+    return sphereSurface(r).makePointData(step=step, dtype=dtype)
+
+def makeTorusPoints(R, r, step=.1, dtype=np.float64):
+    '''Point data of a torus with ring radius R and tube radius r 
+'''
+    return torusSurface(R, r).makePointData(step=step, dtype=dtype)
+
+def makeCylinderPoints(r, height, step=.1, dtype=np.float64):
+    '''Point data of a cylinder of radius r and height 
+'''
+    return cylinderSurface(r, height).makePointData(step=step, dtype=dtype)
     
-def displayPointCloud(pointCloud):
+def displayPointCloud(pointCloud, offscreen=False, filename=None, size=(300, 300)):
     '''Example
     pointCloud = makePointCloudActor(xBegin=-radius, xEnd=radius, yBegin=-radius, yEnd=radius, functZ=parabola3D, step=step, dtype=np.float64)
     displayPointCloud(pointCloud=pointCloud)
+    : offscreen render without a window or interactor, to the PNG filename when given 
+    : return (height, width, 3) image when offscreen 
 '''
     renderer = vtk.vtkRenderer()
     renderer.AddActor(pointCloud.vtkActor)
 #renderer.SetBackground(.2, .3, .4)
     renderer.SetBackground(0.0, 0.0, 0.0)
     renderer.ResetCamera()
+    if offscreen:
+        window = RenderWindow(size=size, offscreen=True)
+        window.renderWindow.AddRenderer(renderer)
+        if filename:
+            window.saveImage(filename)
+        return window.captureImage()
     renderWindow = vtk.vtkRenderWindow()
     renderWindow.AddRenderer(renderer)
     renderWindowInteractor = vtk.vtkRenderWindowInteractor()
@@ -23,8 +23,36 @@
 '''
 
 import vtk 
+from functools import lru_cache
+import numpy as np
+from vtk.util import numpy_support
 from kanvas.canvas import Renderer, RenderWindow, Box 
 
+@lru_cache(maxsize=256)
+def cachedArrowSource(shaftRadius, tipLength):
+    '''Arrow source shared by every caller with the same parameters, least recently used evicted 
+'''
+    arrow = vtk.vtkArrowSource()
+    arrow.SetShaftRadius(shaftRadius)
+    arrow.SetTipLength(tipLength)
+    return arrow
+
+@lru_cache(maxsize=256)
+def cachedConeSource(height, radius, resolution):
+    '''Cone source shared by every caller with the same parameters, least recently used evicted 
+'''
+    cone = vtk.vtkConeSource()
+    cone.SetHeight(height)
+    cone.SetRadius(radius)
+    cone.SetResolution(resolution)
+    return cone
+
+def clearSourceCache():
+    '''Drop the shared sources, actors using them keep theirs 
+'''
+    cachedArrowSource.cache_clear()
+    cachedConeSource.cache_clear()
+
 class ArrowFactory:
     '''Make arrows 
 '''
@@ -34,15 +62,25 @@ class ArrowFactory:
         self._shaftRadius = shaftRadius
         self._tipLength = tipLength
 
-    def makeArrow(self):
+    def makeArrow(self, shared=True):
         '''Make arrow with current parameter settings 
+    : shared return the cached source shared by arrows of the same settings, actors of it share one 
+        output polydata. Do not change its settings, make an unshared arrow to change. 
 '''
+        if shared:
+            return cachedArrowSource(self._shaftRadius, self._tipLength)
         arrow = vtk.vtkArrowSource()
         arrow.SetShaftRadius(self._shaftRadius)
         
         arrow.SetTipLength(self._tipLength)
         return arrow
 
+    def makeField(self, positions, directions=None, scales=None, colors=None):
+        '''Make one actor of an arrow at every position 
+    : return GlyphField 
+'''
+        return GlyphField(self.makeArrow(), positions, directions=directions, scales=scales, colors=colors)
+
     @property
     def shaftRadius(self):
         return self._shaftRadius
@@ -70,14 +108,24 @@ class ConeFactory:
         self._radius = radius
         self._resolution = resolution
 
-    def makeCone(self):
+    def makeCone(self, shared=True):
         '''Make a cone with the current settings 
+    : shared return the cached source shared by cones of the same settings, actors of it share one 
+        output polydata. Do not change its settings, make an unshared cone to change. 
 '''
+        if shared:
+            return cachedConeSource(self._height, self._radius, self._resolution)
         cone = vtk.vtkConeSource()
         cone.SetHeight(self._height)
         cone.SetRadius(self._radius)
         cone.SetResolution( self._resolution)
         return cone 
+
+    def makeField(self, positions, directions=None, scales=None, colors=None):
+        '''Make one actor of a cone at every position 
+    : return GlyphField 
+'''
+        return GlyphField(self.makeCone(), positions, directions=directions, scales=scales, colors=colors)
     
     @property
     def height(self):
@@ -101,7 +149,97 @@ class ConeFactory:
 
     @resolution.setter
     def resolution(self, value):
-        self.resolution = value
+        self._resolution = value
+
+class GlyphField:
+    '''Instances of one source shape drawn by a single glyph mapper and actor, however many instances. 
+    Shapes pointing along +x, like arrows and cones, are turned to the directions. 
+'''
+    def __init__(self, source, positions, directions=None, scales=None, colors=None, scalarRange=None):
+        '''
+    : source VTK source of the instanced shape 
+    : positions (N, 3) array of instance positions 
+    : directions (N, 3) array the instances point along, +x when None 
+    : scales (N,) array of uniform scales or (N, 3) array of x, y, z scales, 1 when None 
+    : colors (N, 3) or (N, 4) RGB(A) array of 0 to 1 floats or 0 to 255 integers, 
+        or (N,) scalars coloured through the lookup table over scalarRange, the actor colour when None 
+'''
+        self._source = source
+        self._polyData = vtk.vtkPolyData()
+        self._arrays = {}
+        self._mapper = vtk.vtkGlyph3DMapper()
+        self._mapper.SetSourceConnection(source.GetOutputPort())
+        self._mapper.SetInputData(self._polyData)
+        self._mapper.SetOrientationModeToDirection()
+        self._vtkActor = vtk.vtkActor()
+        self._vtkActor.SetMapper(self._mapper)
+        self.update(positions, directions, scales, colors, scalarRange)
+
+    def update(self, positions=None, directions=None, scales=None, colors=None, scalarRange=None):
+        '''Replace the instance arrays given, the others are kept. Arrays given must match the number of positions. 
+'''
+        if positions is not None:
+            positions = np.ascontiguousarray(positions, dtype=np.float64).reshape(-1, 3)
+            points = vtk.vtkPoints()
+            points.SetData(self._wrap('positions', positions))
+            self._polyData.SetPoints(points)
+        if directions is not None:
+            directions = np.ascontiguousarray(directions, dtype=np.float64).reshape(-1, 3)
+            self._polyData.GetPointData().AddArray(self._wrap('directions', directions))
+            self._mapper.SetOrientationArray('directions')
+            self._mapper.OrientOn()
+        if scales is not None:
+            scales = np.ascontiguousarray(scales, dtype=np.float64)
+            self._polyData.GetPointData().AddArray(self._wrap('scales', scales))
+            self._mapper.SetScaleArray('scales')
+            self._mapper.ScalingOn()
+            if scales.ndim == 2:
+                self._mapper.SetScaleModeToScaleByVectorComponents()
+            else:
+                self._mapper.SetScaleModeToScaleByMagnitude()
+        if colors is not None:
+            colors = np.asarray(colors)
+            if colors.ndim == 2:
+                if colors.dtype.kind == 'f':
+                    colors = np.clip(colors * 255.0, 0, 255)
+                self._polyData.GetPointData().AddArray(self._wrap('colors', colors.astype(np.uint8)))
+                self._mapper.SetColorModeToDirectScalars()
+            else:
+                self._polyData.GetPointData().AddArray(self._wrap('colors', np.ascontiguousarray(colors, dtype=np.float64)))
+                self._mapper.SetColorModeToMapScalars()
+                self._mapper.SetScalarRange(scalarRange if scalarRange else (float(colors.min()), float(colors.max())))
+            self._mapper.SetScalarModeToUsePointFieldData()
+            self._mapper.SelectColorArray('colors')
+            self._mapper.ScalarVisibilityOn()
+        self._polyData.Modified()
+
+    def _wrap(self, name, values):
+        '''Wrap a NumPy array without copying, kept alive with the field 
+'''
+        self._arrays[name] = values
+        array = numpy_support.numpy_to_vtk(values, deep=False)
+        array.SetName(name)
+        return array
+
+    @property
+    def numberOfInstances(self):
+        return self._polyData.GetNumberOfPoints()
+
+    @property
+    def source(self):
+        return self._source
+
+    @property
+    def mapper(self):
+        return self._mapper
+
+    @property
+    def vtkPolyData(self):
+        return self._polyData
+
+    @property
+    def vtkActor(self):
+        return self._vtkActor
 
 def parabola3D(x, y, k=-1.5, c=0.0):
     '''
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+
+#=========================================================================
+#
+#  Copyright (c) 2018  Karl T. Diedrich, PhD
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#=========================================================================*/
+
+
+'''Spatial index of points for nearest neighbour, radius, box and pick queries.
+: author Karl T. Diedrich, PhD <ktdiedrich@gmail.com>
+'''
+
+import heapq
+import vtk
+import numpy as np
+
+
+class _Node:
+    '''Octree node, a leaf while children is None
+'''
+    __slots__ = ('center', 'halfSize', 'children', 'ids', 'points')
+
+    def __init__(self, center, halfSize):
+        self.center = np.asarray(center, dtype=np.float64)
+        self.halfSize = halfSize
+        self.children = None
+        self.ids = np.empty(0, dtype=np.int64)
+        self.points = np.empty((0, 3), dtype=np.float64)
+
+    def distance2(self, point):
+        '''Squared distance from point to the node box
+'''
+        d = np.maximum(np.abs(point - self.center) - self.halfSize, 0.0)
+        return float(np.dot(d, d))
+
+
+def _octants(points, center):
+    return ((points[:, 0] >= center[0]).astype(np.int64) + 2 * (points[:, 1] >= center[1]) +
+            4 * (points[:, 2] >= center[2]))
+
+
+def _octantCenter(center, halfSize, octant):
+    offset = np.array((1.0 if octant & 1 else -1.0, 1.0 if octant & 2 else -1.0, 1.0 if octant & 4 else -1.0))
+    return center + offset * halfSize / 2.0
+
+
+def _sortedIds(found):
+    if not found:
+        return np.empty(0, dtype=np.int64)
+    return np.sort(np.concatenate(found))
+
+
+def _displayToWorld(renderer, x, y, z):
+    renderer.SetDisplayPoint(x, y, z)
+    renderer.DisplayToWorld()
+    world = renderer.GetWorldPoint()
+    return np.array(world[:3]) / world[3]
+
+
+class Octree:
+    '''Octree of point ids built incrementally as points are added. Leaves keep their points in
+    NumPy arrays so queries test whole leaves at once.
+'''
+    def __init__(self, leafSize=64, maxDepth=21):
+        '''
+    : leafSize points in a leaf before it splits
+    : maxDepth depth limit, stops splitting of coincident points
+'''
+        self._leafSize = leafSize
+        self._maxDepth = maxDepth
+        self.clear()
+
+    def clear(self):
+        self._root = None
+        self._numPoints = 0
+
+    def insert(self, ids, points):
+        '''Add point ids with their (N, 3) coordinates, or one id and point
+'''
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        if len(ids) == 0:
+            return
+        if self._root is None:
+            low = points.min(axis=0)
+            high = points.max(axis=0)
+            self._root = _Node((low + high) / 2.0, max(float(np.max(high - low)) / 2.0, 1e-6) * 1.01)
+        self._growToContain(points)
+        self._insert(self._root, ids, points, 0)
+        self._numPoints += len(ids)
+
+    def remove(self, ids, points):
+        '''Remove point ids stored with their (N, 3) coordinates
+'''
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        for pointId, point in zip(ids, points):
+            node = self._leaf(point)
+            if node is None:
+                continue
+            keep = node.ids != pointId
+            self._numPoints -= int(len(keep) - np.count_nonzero(keep))
+            node.ids = node.ids[keep]
+            node.points = node.points[keep]
+
+    def update(self, ids, oldPoints, newPoints):
+        '''Move point ids from old to new coordinates
+'''
+        self.remove(ids, oldPoints)
+        self.insert(ids, newPoints)
+
+    def box(self, low, high):
+        '''
+    : return ids of points inside the box low <= p <= high
+'''
+        low = np.asarray(low, dtype=np.float64)
+        high = np.asarray(high, dtype=np.float64)
+        found = []
+        stack = [self._root] if self._root else []
+        while stack:
+            node = stack.pop()
+            if np.any(node.center + node.halfSize < low) or np.any(node.center - node.halfSize > high):
+                continue
+            if node.children is None:
+                inside = np.all((node.points >= low) & (node.points <= high), axis=1)
+                found.append(node.ids[inside])
+            else:
+                stack.extend(child for child in node.children if child)
+        return _sortedIds(found)
+
+    def radius(self, center, radius):
+        '''
+    : return ids of points within radius of center
+'''
+        center = np.asarray(center, dtype=np.float64)
+        radius2 = radius * radius
+        found = []
+        stack = [self._root] if self._root else []
+        while stack:
+            node = stack.pop()
+            if node.distance2(center) > radius2:
+                continue
+            if node.children is None:
+                d = node.points - center
+                found.append(node.ids[np.einsum('ij,ij->i', d, d) <= radius2])
+            else:
+                stack.extend(child for child in node.children if child)
+        return _sortedIds(found)
+
+    def nearest(self, point, k=1):
+        '''Best-first search of the k nearest points
+    : return (ids, distances) arrays ordered by distance
+'''
+        point = np.asarray(point, dtype=np.float64)
+        bestIds = np.empty(0, dtype=np.int64)
+        bestDistance2 = np.empty(0, dtype=np.float64)
+        heap = [(0.0, 0, self._root)] if self._root else []
+        counter = 1
+        while heap:
+            nodeDistance2, _, node = heapq.heappop(heap)
+            if len(bestIds) == k and nodeDistance2 > bestDistance2[-1]:
+                break
+            if node.children is None:
+                d = node.points - point
+                ids = np.concatenate((bestIds, node.ids))
+                distance2 = np.concatenate((bestDistance2, np.einsum('ij,ij->i', d, d)))
+                order = np.argsort(distance2, kind='stable')[:k]
+                bestIds = ids[order]
+                bestDistance2 = distance2[order]
+            else:
+                for child in node.children:
+                    if child:
+                        heapq.heappush(heap, (child.distance2(point), counter, child))
+                        counter += 1
+        return bestIds, np.sqrt(bestDistance2)
+
+    def ray(self, origin, direction, radius):
+        '''Points within radius of a ray, e.g. a pick ray from the camera
+    : return (ids, distances along the ray, distances from the ray) of points in front of origin
+'''
+        origin = np.asarray(origin, dtype=np.float64)
+        direction = np.asarray(direction, dtype=np.float64)
+        direction = direction / np.linalg.norm(direction)
+        with np.errstate(divide='ignore'):
+            inverse = 1.0 / direction
+        found = []
+        stack = [self._root] if self._root else []
+        while stack:
+            node = stack.pop()
+            # slab test against the node box grown by the radius
+            with np.errstate(invalid='ignore'):
+                t0 = (node.center - node.halfSize - radius - origin) * inverse
+                t1 = (node.center + node.halfSize + radius - origin) * inverse
+            t0 = np.where(np.isnan(t0), -np.inf, t0)
+            t1 = np.where(np.isnan(t1), np.inf, t1)
+            tNear = np.max(np.minimum(t0, t1))
+            tFar = np.min(np.maximum(t0, t1))
+            if tNear > tFar or tFar < 0:
+                continue
+            if node.children is None:
+                d = node.points - origin
+                along = d @ direction
+                across = np.sqrt(np.maximum(np.einsum('ij,ij->i', d, d) - along * along, 0.0))
+                hit = (along >= 0) & (across <= radius)
+                found.append((node.ids[hit], along[hit], across[hit]))
+            else:
+                stack.extend(child for child in node.children if child)
+        if not found:
+            return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+        ids, along, across = (np.concatenate(values) for values in zip(*found))
+        return ids, along, across
+
+    def _insert(self, node, ids, points, depth):
+        while True:
+            if node.children is None:
+                node.ids = np.concatenate((node.ids, ids))
+                node.points = np.concatenate((node.points, points))
+                if len(node.ids) <= self._leafSize or depth >= self._maxDepth:
+                    return
+                ids, points = node.ids, node.points
+                node.ids = np.empty(0, dtype=np.int64)
+                node.points = np.empty((0, 3), dtype=np.float64)
+                node.children = [None] * 8
+            octants = _octants(points, node.center)
+            present = np.unique(octants)
+            if len(present) == 1:
+                node = self._child(node, int(present[0]))
+                depth += 1
+                continue
+            order = np.argsort(octants, kind='stable')
+            bounds = np.searchsorted(octants[order], np.arange(9))
+            for octant in present:
+                select = order[bounds[octant]:bounds[octant + 1]]
+                self._insert(self._child(node, int(octant)), ids[select], points[select], depth + 1)
+            return
+
+    def _child(self, node, octant):
+        if node.children[octant] is None:
+            node.children[octant] = _Node(_octantCenter(node.center, node.halfSize, octant), node.halfSize / 2.0)
+        return node.children[octant]
+
+    def _growToContain(self, points):
+        low = points.min(axis=0)
+        high = points.max(axis=0)
+        while np.any(low < self._root.center - self._root.halfSize) or \
+                np.any(high >= self._root.center + self._root.halfSize):
+            old = self._root
+            # grow toward the points, the old root becomes the child on the opposite side
+            toward = np.where(low < old.center - old.halfSize, -1.0, 1.0)
+            root = _Node(old.center + toward * old.halfSize, old.halfSize * 2.0)
+            root.children = [None] * 8
+            octant = int(_octants(old.center[np.newaxis, :], root.center)[0])
+            root.children[octant] = old
+            self._root = root
+            self._maxDepth += 1
+
+    def _leaf(self, point):
+        node = self._root
+        while node is not None and node.children is not None:
+            node = node.children[int(_octants(point[np.newaxis, :], node.center)[0])]
+        return node
+
+    @property
+    def numPoints(self):
+        return self._numPoints
+
+    @property
+    def leafSize(self):
+        return self._leafSize
+
+
+class PointPicker:
+    '''Pick points of PointData under the cursor with the interactor pick key ('p'). Casts a ray
+    from the camera through the cursor and queries the spatial index of the point data.
+'''
+    def __init__(self, renderWindow, pointData, radius=0.1, callback=None, actor=None):
+        '''
+    : renderWindow kanvas RenderWindow
+    : pointData PointData with a spatial index
+    : radius distance from the pick ray that counts as a hit
+    : callback function(ids, points) of the picked points ordered by distance to the camera, prints when None
+    : actor vtkActor showing the point data, its position and user transform are undone before querying
+'''
+        self._renderWindow = renderWindow
+        self._pointData = pointData
+        self._radius = radius
+        self._callback = callback if callback else self.printPick
+        self._actor = actor
+        self._lastPick = np.empty(0, dtype=np.int64)
+        renderWindow.interactor.AddObserver("EndPickEvent", self.pickCallback)
+
+    def pick(self, x, y, renderer):
+        '''Pick at display position x, y of a vtkRenderer
+    : return ids of points near the pick ray, nearest to the camera first
+'''
+        near = _displayToWorld(renderer, x, y, 0.0)
+        far = _displayToWorld(renderer, x, y, 1.0)
+        if self._actor:
+            inverse = vtk.vtkMatrix4x4()
+            vtk.vtkMatrix4x4.Invert(self._actor.GetMatrix(), inverse)
+            near = np.array(inverse.MultiplyPoint(tuple(near) + (1.0,))[:3])
+            far = np.array(inverse.MultiplyPoint(tuple(far) + (1.0,))[:3])
+        ids, along, across = self._pointData.spatialIndex.ray(near, far - near, self._radius)
+        self._lastPick = ids[np.lexsort((across, along))]
+        return self._lastPick
+
+    def pickCallback(self, interactor, eventString):
+        '''Pick at the interactor event position
+'''
+        x, y = interactor.GetEventPosition()
+        renderer = interactor.FindPokedRenderer(x, y)
+        ids = self.pick(x, y, renderer)
+        self._callback(ids, self._pointData.points[ids])
+
+    def printPick(self, ids, points):
+        '''Print the nearest picked point
+'''
+        if len(ids):
+            print("Picked point {} at {} of {} near the cursor".format(ids[0], points[0], len(ids)))
+        else:
+            print("No point picked")
+
+    @property
+    def lastPick(self):
+        return self._lastPick
+
+    @property
+    def radius(self):
+        return self._radius
+
+    @radius.setter
+    def radius(self, value):
+        self._radius = value
@@ -23,6 +23,7 @@
 : author Karl Diedrich, PhD <ktdiedrich@gmail.com>
 '''
 
+import functools
 import numpy as np
 
 
@@ -50,6 +51,15 @@ def zRotation(t):
                       [np.sin(t), np.cos(t),  0.0],
                       [0.0,       0.0,        1.0 ] ])
 
+@functools.lru_cache(maxsize=256)
+def cachedRotation(rx, ry, rz):
+    '''Combined rotation matrix kept in a small LRU cache keyed by the angles 
+    : return read-only 3 axis rotation matrix shared between callers 
+'''
+    rot = np.matmul(zRotation(rz), np.matmul(yRotation(ry), xRotation(rx)))
+    rot.setflags(write=False)
+    return rot
+
 def rotation(rx, ry, rz):
     '''Combined rotation matrix
     : rx rotation around x axis 
@@ -57,12 +67,29 @@ def rotation(rx, ry, rz):
     : rz rotation around z axis
     : return 3 axis rotation matrix 
 '''
-    xRot = xRotation(rx)
-    yRot = yRotation(ry)
-    zRot = zRotation(rz) 
-    rot = np.matmul(yRot, xRot)
-    rot = np.matmul(zRot, rot)
-    return rot
+    return cachedRotation(rx, ry, rz).copy()
+
+def homogeneous(matrix):
+    '''
+    : return 4x4 homogeneous matrix of a 3x3 linear matrix 
+'''
+    hom = np.identity(4)
+    hom[:3, :3] = matrix
+    return hom
+
+def translation(tx, ty, tz):
+    '''
+    : return 4x4 homogeneous translation matrix 
+'''
+    hom = np.identity(4)
+    hom[:3, 3] = (tx, ty, tz)
+    return hom
+
+def scaling(sx, sy, sz):
+    '''
+    : return 4x4 homogeneous scale matrix 
+'''
+    return np.diag((sx, sy, sz, 1.0))
 
 class Rotation:
     '''
@@ -72,11 +99,20 @@ class Rotation:
 '''
         self._matrix = matrix
         
-    def rotate(self, point):
-        '''
+    def rotate(self, point, inPlace=False):
+        '''Rotate a point or an (N, 3) array of points in one matrix multiply 
+    : inPlace write rotated points into the floating point input array 
 '''
-        trans = np.dot(self._matrix, point)
-        return trans 
+        points = np.asarray(point)
+        if points.ndim == 1:
+            trans = np.dot(self._matrix, points)
+            if inPlace:
+                points[:] = trans
+                return points
+            return trans
+        if inPlace:
+            return np.matmul(points, self._matrix.T, out=points)
+        return np.matmul(points, self._matrix.T)
 
     @property
     def matrix(self):
@@ -86,6 +122,254 @@ class Rotation:
     def matrix(self, value):
         self._matrix = value 
 
+class Transform:
+    '''Rotations, translations and scales composed into one 4x4 homogeneous matrix before they are applied. 
+    Each operation applies after the ones before it: Transform().rotate(rx, ry, rz).translate(1, 0, 0) 
+    rotates then translates. 
+'''
+    def __init__(self, matrix=None):
+        '''
+    : matrix 4x4 homogeneous or 3x3 linear matrix, identity when None 
+'''
+        if matrix is None:
+            self._matrix = np.identity(4)
+        else:
+            matrix = np.asarray(matrix, dtype=np.float64)
+            self._matrix = homogeneous(matrix) if matrix.shape == (3, 3) else matrix.copy()
+
+    def compose(self, matrix):
+        '''Apply a 4x4 homogeneous matrix, 3x3 matrix or Transform after this transform 
+    : return self for chaining 
+'''
+        if isinstance(matrix, Transform):
+            matrix = matrix.matrix
+        matrix = np.asarray(matrix)
+        if matrix.shape == (3, 3):
+            matrix = homogeneous(matrix)
+        self._matrix = np.matmul(matrix, self._matrix)
+        return self
+
+    def rotate(self, rx, ry, rz):
+        '''Rotate around x, then y, then z axis, in radians, using cached rotation matrices 
+'''
+        return self.compose(cachedRotation(rx, ry, rz))
+
+    def translate(self, tx, ty, tz):
+        return self.compose(translation(tx, ty, tz))
+
+    def scale(self, sx, sy=None, sz=None):
+        '''Scale by sx on every axis, or by sx, sy, sz 
+'''
+        return self.compose(scaling(sx, sx if sy is None else sy, sx if sz is None else sz))
+
+    def inverse(self):
+        return Transform(np.linalg.inv(self._matrix))
+
+    def apply(self, point, inPlace=False):
+        '''Transform a point or an (N, 3) array of points in one call. The matrix is taken as affine. 
+    : inPlace write transformed points into the floating point input array 
+'''
+        points = np.asarray(point)
+        linear = self._matrix[:3, :3]
+        offset = self._matrix[:3, 3]
+        if inPlace:
+            if points.ndim == 1:
+                points[:] = np.dot(linear, points)
+            else:
+                np.matmul(points, linear.T, out=points)
+            points += offset
+            return points
+        if points.ndim == 1:
+            return np.dot(linear, points) + offset
+        trans = np.matmul(points, linear.T)
+        trans += offset
+        return trans
+
+    @property
+    def matrix(self):
+        return self._matrix
+
+    @matrix.setter
+    def matrix(self, value):
+        self._matrix = value
+
+class Quaternion:
+    '''Unit quaternion w + x i + y j + z k of a rotation 
+'''
+    def __init__(self, w=1.0, x=0.0, y=0.0, z=0.0):
+        self._q = np.array((w, x, y, z), dtype=np.float64)
+
+    def __mul__(self, other):
+        '''Hamilton product, the rotation of other followed by the rotation of self 
+'''
+        return Quaternion(*quaternionMultiply(self._q, other.array))
+
+    def __repr__(self):
+        return "Quaternion(w={}, x={}, y={}, z={})".format(*self._q)
+
+    def conjugate(self):
+        w, x, y, z = self._q
+        return Quaternion(w, -x, -y, -z)
+
+    def normalized(self):
+        return Quaternion(*(self._q / np.linalg.norm(self._q)))
+
+    def toMatrix(self):
+        '''
+    : return 3x3 rotation matrix 
+'''
+        return quaternionsToMatrices(self._q)
+
+    def rotate(self, point):
+        '''Rotate a point or an (N, 3) array of points 
+'''
+        return Rotation(self.toMatrix()).rotate(point)
+
+    @property
+    def array(self):
+        return self._q
+
+def quaternionMultiply(q1, q2):
+    '''Hamilton products of quaternions in (..., 4) arrays 
+'''
+    w1, x1, y1, z1 = np.moveaxis(np.asarray(q1, dtype=np.float64), -1, 0)
+    w2, x2, y2, z2 = np.moveaxis(np.asarray(q2, dtype=np.float64), -1, 0)
+    return np.stack((w1*w2 - x1*x2 - y1*y2 - z1*z2,
+                     w1*x2 + x1*w2 + y1*z2 - z1*y2,
+                     w1*y2 - x1*z2 + y1*w2 + z1*x2,
+                     w1*z2 + x1*y2 - y1*x2 + z1*w2), axis=-1)
+
+def quaternionsToMatrices(q):
+    '''Rotation matrices of unit quaternions 
+    : q (4,) or (N, 4) array of w, x, y, z 
+    : return (3, 3) or (N, 3, 3) array 
+'''
+    q = np.asarray(q, dtype=np.float64)
+    q = q / np.linalg.norm(q, axis=-1, keepdims=True)
+    w, x, y, z = np.moveaxis(q, -1, 0)
+    matrices = np.stack((1 - 2*(y*y + z*z), 2*(x*y - z*w),     2*(x*z + y*w),
+                         2*(x*y + z*w),     1 - 2*(x*x + z*z), 2*(y*z - x*w),
+                         2*(x*z - y*w),     2*(y*z + x*w),     1 - 2*(x*x + y*y)), axis=-1)
+    return matrices.reshape(q.shape[:-1] + (3, 3))
+
+def quaternionFromMatrix(matrix):
+    '''Quaternion of a 3x3 rotation matrix 
+'''
+    m = np.asarray(matrix, dtype=np.float64)
+    trace = m[0, 0] + m[1, 1] + m[2, 2]
+    if trace > 0:
+        s = 2.0 * np.sqrt(trace + 1.0)
+        q = (0.25 * s, (m[2, 1] - m[1, 2]) / s, (m[0, 2] - m[2, 0]) / s, (m[1, 0] - m[0, 1]) / s)
+    elif m[0, 0] > m[1, 1] and m[0, 0] > m[2, 2]:
+        s = 2.0 * np.sqrt(1.0 + m[0, 0] - m[1, 1] - m[2, 2])
+        q = ((m[2, 1] - m[1, 2]) / s, 0.25 * s, (m[0, 1] + m[1, 0]) / s, (m[0, 2] + m[2, 0]) / s)
+    elif m[1, 1] > m[2, 2]:
+        s = 2.0 * np.sqrt(1.0 + m[1, 1] - m[0, 0] - m[2, 2])
+        q = ((m[0, 2] - m[2, 0]) / s, (m[0, 1] + m[1, 0]) / s, 0.25 * s, (m[1, 2] + m[2, 1]) / s)
+    else:
+        s = 2.0 * np.sqrt(1.0 + m[2, 2] - m[0, 0] - m[1, 1])
+        q = ((m[1, 0] - m[0, 1]) / s, (m[0, 2] + m[2, 0]) / s, (m[1, 2] + m[2, 1]) / s, 0.25 * s)
+    return Quaternion(*q).normalized()
+
+def quaternionFromAxisAngle(axis, angle):
+    '''Quaternion of a rotation by angle radians around axis 
+'''
+    axis = np.asarray(axis, dtype=np.float64)
+    axis = axis / np.linalg.norm(axis)
+    x, y, z = np.sin(angle / 2.0) * axis
+    return Quaternion(np.cos(angle / 2.0), x, y, z)
+
+def quaternionFromEuler(rx, ry, rz):
+    '''Quaternion of the same rotation as rotation(rx, ry, rz) 
+'''
+    return quaternionFromAxisAngle((0, 0, 1), rz) * quaternionFromAxisAngle((0, 1, 0), ry) * \
+        quaternionFromAxisAngle((1, 0, 0), rx)
+
+def slerp(q0, q1, t):
+    '''Spherical linear interpolation, vectorized over quaternions and interpolation parameters 
+    : q0, q1 (4,) or (N, 4) arrays of unit quaternions 
+    : t scalar or (N,) array of parameters in [0, 1] 
+    : return (N, 4) or (4,) array of unit quaternions along the shorter arc 
+'''
+    q0 = np.asarray(q0, dtype=np.float64)
+    q1 = np.asarray(q1, dtype=np.float64)
+    t = np.asarray(t, dtype=np.float64)[..., np.newaxis]
+    dot = np.sum(q0 * q1, axis=-1, keepdims=True)
+    q1 = np.where(dot < 0.0, -q1, q1)
+    dot = np.clip(np.abs(dot), 0.0, 1.0)
+    theta = np.arccos(dot)
+    sinTheta = np.sin(theta)
+    near = sinTheta < 1e-6
+    safeSin = np.where(near, 1.0, sinTheta)
+    w0 = np.where(near, 1.0 - t, np.sin((1.0 - t) * theta) / safeSin)
+    w1 = np.where(near, t, np.sin(t * theta) / safeSin)
+    q = w0 * q0 + w1 * q1
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+class OrientationTrack:
+    '''Keyframe orientations interpolated with slerp and precomputed as one array for every frame 
+'''
+    def __init__(self, times, quaternions):
+        '''
+    : times increasing keyframe times 
+    : quaternions Quaternion objects or (K, 4) array, one per keyframe 
+'''
+        self._times = np.asarray(times, dtype=np.float64)
+        self._keys = np.array([q.array if isinstance(q, Quaternion) else q for q in quaternions], dtype=np.float64)
+        self._quaternions = None
+        self._matrices = None
+
+    def interpolate(self, times):
+        '''
+    : return (T, 4) array of orientations at times, clamped to the first and last keyframe 
+'''
+        times = np.clip(np.asarray(times, dtype=np.float64), self._times[0], self._times[-1])
+        if len(self._times) == 1:
+            return np.repeat(self._keys, len(times), axis=0)
+        index = np.clip(np.searchsorted(self._times, times, side='right') - 1, 0, len(self._times) - 2)
+        t = (times - self._times[index]) / (self._times[index + 1] - self._times[index])
+        return slerp(self._keys[index], self._keys[index + 1], t)
+
+    def precompute(self, numFrames, endpoint=True):
+        '''Precompute orientations and rotation matrices of numFrames evenly spaced frames over the track 
+    : endpoint include the last keyframe as the last frame, False for closed loops whose last keyframe 
+    repeats the first so looping frames do not show it twice 
+'''
+        times = np.linspace(self._times[0], self._times[-1], numFrames, endpoint=endpoint)
+        self._quaternions = self.interpolate(times)
+        self._matrices = quaternionsToMatrices(self._quaternions)
+        return self
+
+    def quaternion(self, frame):
+        return Quaternion(*self._quaternions[frame % len(self._quaternions)])
+
+    def matrix(self, frame):
+        '''Precomputed 3x3 rotation matrix of a frame, frames wrap around 
+'''
+        return self._matrices[frame % len(self._matrices)]
+
+    @property
+    def numFrames(self):
+        return 0 if self._quaternions is None else len(self._quaternions)
+
+    @property
+    def quaternions(self):
+        return self._quaternions
+
+    @property
+    def matrices(self):
+        return self._matrices
+
+def turntableTrack(numFrames, axis=(0.0, 0.0, 1.0), turns=1):
+    '''Precomputed track of numFrames distinct orientations turning around axis, keyed every 90 degrees 
+    so slerp follows the full turn without gimbal lock. Frames are 360*turns/numFrames degrees apart and 
+    stop one step short of the full turn, so the track loops without repeating a frame. 
+'''
+    numKeys = 4 * turns + 1
+    angles = np.linspace(0.0, 2 * np.pi * turns, numKeys)
+    keys = [quaternionFromAxisAngle(axis, angle) for angle in angles]
+    return OrientationTrack(angles / angles[-1], keys).precompute(numFrames, endpoint=False)
+
 if __name__ == '__main__':
     xDeg = 30.0
     yDeg = 45.0